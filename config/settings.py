@@ -55,13 +55,37 @@ class Config:
     # RAG & Embeddings
     EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
     EMBEDDING_DIMENSION = int(os.getenv('EMBEDDING_DIMENSION', '384'))
+    EMBEDDING_INDEX_MAX_MB = int(os.getenv('EMBEDDING_INDEX_MAX_MB', '256'))  # in-memory per-user vectors
+    EMBEDDING_INDEX_REFRESH_SECONDS = float(os.getenv('EMBEDDING_INDEX_REFRESH_SECONDS', '5'))  # recheck loaded users against the DB
+    EMBEDDING_STORAGE_FORMAT = os.getenv('EMBEDDING_STORAGE_FORMAT', 'float32')  # float32 | float16 | int8
+    EMBEDDING_INDEX_FORMAT = os.getenv('EMBEDDING_INDEX_FORMAT', EMBEDDING_STORAGE_FORMAT)
+    STORE_VECTOR_EMBEDDINGS = os.getenv('STORE_VECTOR_EMBEDDINGS', 'True') == 'True'  # duplicate float array rows
+    EMBEDDING_CACHE_BACKEND = os.getenv('EMBEDDING_CACHE_BACKEND', 'redis')  # redis | sqlite | none
+    EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', 'memory/embedding_cache.db')
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '10000'))
+    EMBEDDING_CACHE_TTL = int(os.getenv('EMBEDDING_CACHE_TTL', str(7 * 86400)))  # 7 days
+    EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))  # 1 disables micro-batching
+    EMBEDDING_BATCH_WAIT_MS = float(os.getenv('EMBEDDING_BATCH_WAIT_MS', '5'))
+    EMBEDDING_WARMUP_ON_START = os.getenv('EMBEDDING_WARMUP_ON_START', 'True') == 'True'
+    VECTOR_STORE_BACKEND = os.getenv('VECTOR_STORE_BACKEND', 'memory')  # memory | mmap | pgvector
+    VECTOR_STORE_DIR = os.getenv('VECTOR_STORE_DIR', 'memory/vector_store')
+    PGVECTOR_INDEX = os.getenv('PGVECTOR_INDEX', 'hnsw')  # hnsw | ivfflat
+    PGVECTOR_EF_SEARCH = int(os.getenv('PGVECTOR_EF_SEARCH', '40'))
+    PGVECTOR_PROBES = int(os.getenv('PGVECTOR_PROBES', '10'))
+    PGVECTOR_IVF_LISTS = int(os.getenv('PGVECTOR_IVF_LISTS', '100'))
     LLM_MODEL = os.getenv('LLM_MODEL', 'gemini-2.0-flash')
     
     # RAG Settings
     RAG_CHUNK_SIZE = int(os.getenv('RAG_CHUNK_SIZE', '500'))
     RAG_CHUNK_OVERLAP = int(os.getenv('RAG_CHUNK_OVERLAP', '50'))
+    RAG_INGEST_BATCH_SIZE = int(os.getenv('RAG_INGEST_BATCH_SIZE', '64'))  # chunks per embed + insert
+    RAG_INGEST_CHECKPOINT_PATH = os.getenv('RAG_INGEST_CHECKPOINT_PATH', 'memory/ingest_checkpoints.db')
     RAG_SIMILARITY_THRESHOLD = float(os.getenv('RAG_SIMILARITY_THRESHOLD', '0.3'))
     RAG_TOP_K = int(os.getenv('RAG_TOP_K', '5'))
+    RAG_SEARCH_BACKEND = os.getenv('RAG_SEARCH_BACKEND', 'exact')  # exact | ivf
+    ANN_N_PROBE = int(os.getenv('ANN_N_PROBE', '16'))  # IVF lists scanned per query
+    ANN_MIN_TRAIN_SIZE = int(os.getenv('ANN_MIN_TRAIN_SIZE', '2048'))  # exact scan below this
+    ANN_REBUILD_SECONDS = int(os.getenv('ANN_REBUILD_SECONDS', '3600'))
     
     # Flask
     FLASK_HOST = os.getenv('FLASK_HOST', '0.0.0.0')
@@ -86,6 +110,21 @@ class Config:
     INTERVIEW_TIME_LIMIT = int(os.getenv('INTERVIEW_TIME_LIMIT', '45'))  # minutes
     MAX_CONCURRENT_INTERVIEWS = int(os.getenv('MAX_CONCURRENT_INTERVIEWS', '10'))
     
+    # Code Sandbox
+    PYTHON_WORKER_POOL_SIZE = int(os.getenv('PYTHON_WORKER_POOL_SIZE', str(MAX_CONCURRENT_INTERVIEWS)))  # 0 disables warm workers
+    PYTHON_WORKER_MAX_RUNS = int(os.getenv('PYTHON_WORKER_MAX_RUNS', '100'))  # recycle after N runs
+    # Parallel test-case runs per submission: a fair share of the CPUs across concurrent interviews,
+    # at least 4 since runs mostly wait on their child process; the warm pool caps the total
+    SUBMISSION_MAX_WORKERS = int(os.getenv('SUBMISSION_MAX_WORKERS', str(max(4, (os.cpu_count() or 1) // MAX_CONCURRENT_INTERVIEWS))))
+    ARTIFACT_CACHE_DIR = os.getenv('ARTIFACT_CACHE_DIR')  # defaults to ~/.cache/maang_artifact_cache; must be private
+    ARTIFACT_CACHE_MAX_MB = int(os.getenv('ARTIFACT_CACHE_MAX_MB', '256'))  # 0 disables the cache
+    SUBMISSION_QUEUE_MAX_DEPTH = int(os.getenv('SUBMISSION_QUEUE_MAX_DEPTH', '100'))
+    SUBMISSION_QUEUE_MAX_PER_USER = int(os.getenv('SUBMISSION_QUEUE_MAX_PER_USER', '3'))
+    SUBMISSION_QUEUE_TIMEOUT = float(os.getenv('SUBMISSION_QUEUE_TIMEOUT', '60'))  # seconds
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '10000'))
+    EXECUTION_HISTORY_SIZE = int(os.getenv('EXECUTION_HISTORY_SIZE', '1000'))
+    EXECUTION_STATS_WINDOW = int(os.getenv('EXECUTION_STATS_WINDOW', '1000'))  # runs per language
+    
     # Session
     SESSION_TIMEOUT = int(os.getenv('SESSION_TIMEOUT', '1800'))  # 30 minutes
 
@@ -14,7 +14,14 @@ from .simulation_engine import (
 from .compiler import (
     CodeCompiler,
     InterviewCodeValidator,
-    ExecutionResult
+    ExecutionResult,
+    CompiledProgram
+)
+
+from .submission_queue import (
+    SubmissionScheduler,
+    SubmissionRejected,
+    get_submission_scheduler
 )
 
 from .scheduler import (
@@ -33,6 +40,10 @@ __all__ = [
     "CodeCompiler",
     "InterviewCodeValidator",
     "ExecutionResult",
+    "CompiledProgram",
+    "SubmissionScheduler",
+    "SubmissionRejected",
+    "get_submission_scheduler",
     "InterviewScheduler",
     "ScheduledInterview",
     "InterviewStatus",
@@ -0,0 +1,192 @@
+"""
+Compilation Artifact Cache - content-addressed store for compiled submissions
+
+Binaries and .class files produced by CodeCompiler._compile are kept on local
+disk under a key derived from (language, compiler version, compiler flags,
+sha256 of source). Entries are evicted least-recently-used once the cache
+exceeds its size budget. Writes go through a staging directory and an
+atomic rename, so several processes can share one cache directory.
+
+Cached binaries are executed, so the directory must be private: it defaults
+to a per-user cache directory, is created 0700, and a directory that another
+user owns or can write to is refused.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import subprocess
+import threading
+import uuid
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_version(executable: str) -> str:
+    """Identify the installed compiler, so an upgrade misses the cache"""
+    path = shutil.which(executable)
+    if path is None:
+        return ""
+    try:
+        result = subprocess.run([path, "--version"], capture_output=True, timeout=10)
+        version = (result.stdout + result.stderr).decode(errors="replace")
+    except (OSError, subprocess.SubprocessError):
+        version = ""
+    # The binary itself covers compilers without a usable --version
+    info = os.stat(os.path.realpath(path))
+    return f"{os.path.realpath(path)}:{info.st_size}:{info.st_mtime_ns}:{version}"
+
+
+def default_cache_root() -> str:
+    """Per-user cache directory, never a shared temp path"""
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "maang_artifact_cache")
+
+
+class ArtifactCache:
+    """Size-bounded LRU cache of compiler outputs on local disk"""
+
+    def __init__(self, root: str, max_bytes: int = 256 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, mode=0o700, exist_ok=True)
+        self._check_private()
+
+    @staticmethod
+    def make_key(language: str, compile_command: List[str], code: str,
+                 version: str = "") -> str:
+        """Content address for one (language, compiler version, flags, source) combination"""
+        source_hash = hashlib.sha256(code.encode()).hexdigest()
+        material = json.dumps([language, version, compile_command, source_hash])
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def restore(self, key: str, dest_dir: str) -> bool:
+        """Copy a cached build into dest_dir; returns False on a miss"""
+        entry = os.path.join(self.root, key)
+
+        try:
+            names = os.listdir(entry)
+            for name in names:
+                # copy2 keeps the executable bit on native binaries
+                shutil.copy2(os.path.join(entry, name), os.path.join(dest_dir, name))
+            os.utime(entry)
+        except OSError:
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        return True
+
+    def store(self, key: str, src_dir: str, exclude: Optional[List[str]] = None):
+        """Save every build output in src_dir except the excluded source files"""
+        entry = os.path.join(self.root, key)
+        if os.path.isdir(entry):
+            return
+
+        exclude = set(exclude or [])
+        staging = os.path.join(self.root, f".staging-{uuid.uuid4().hex}")
+
+        try:
+            os.makedirs(staging)
+            for name in os.listdir(src_dir):
+                path = os.path.join(src_dir, name)
+                if name in exclude or not os.path.isfile(path):
+                    continue
+                shutil.copy2(path, os.path.join(staging, name))
+            os.rename(staging, entry)
+        except OSError:
+            # Lost a race with another writer, or the disk is unhappy
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current footprint"""
+        entries = self._entries()
+        total = self.hits + self.misses
+        return {
+            "entries": len(entries),
+            "size_bytes": sum(size for _, _, size in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0
+        }
+
+    def clear(self):
+        """Drop every cached artifact"""
+        with self._lock:
+            for path, _, _ in self._entries():
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _check_private(self):
+        """Refuse a directory another local user could plant binaries in"""
+        info = os.stat(self.root)
+        if not hasattr(os, "getuid"):
+            return  # Windows: rely on the profile directory's ACLs
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"Artifact cache {self.root} is owned by another user")
+        if stat.S_IMODE(info.st_mode) & 0o077:
+            os.chmod(self.root, 0o700)
+
+    def _entries(self):
+        """(path, last_used, size) for every complete entry"""
+        entries = []
+        for name in os.listdir(self.root):
+            if name.startswith("."):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)
+                )
+                entries.append((path, os.path.getmtime(path), size))
+            except OSError:
+                continue
+        return entries
+
+    def _evict(self):
+        """Remove least recently used entries until under budget"""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, _, size in entries)
+            if total <= self.max_bytes:
+                return
+
+            for path, _, size in sorted(entries, key=lambda e: e[1]):
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+
+# Global instance
+_artifact_cache: Optional[ArtifactCache] = None
+_artifact_cache_lock = threading.Lock()
+
+
+def get_artifact_cache(root: Optional[str] = None, max_mb: int = 256) -> Optional[ArtifactCache]:
+    """Get or create the shared artifact cache; None if max_mb is 0 or the directory is unsafe"""
+    global _artifact_cache
+    if max_mb <= 0:
+        return None
+
+    with _artifact_cache_lock:
+        if _artifact_cache is None:
+            try:
+                _artifact_cache = ArtifactCache(root or default_cache_root(),
+                                                max_bytes=max_mb * 1024 * 1024)
+            except OSError as e:
+                logger.warning(f"Artifact cache disabled: {e}")
+                return None
+    return _artifact_cache
@@ -0,0 +1,184 @@
+/**
+ * JavaScript Batch Driver - runs one solution against every test input in one process
+ *
+ * Usage: node batch_driver.js <solution.js> <cases.json> <results.jsonl> [case_timeout]
+ *
+ * The solution is compiled once as a CommonJS-style function and invoked per
+ * case with its own `process`, `console` and `require('fs')` views, so the
+ * usual stdin idioms (fs.readFileSync(0), process.stdin events, readline)
+ * see the case input. One JSON line per case is appended to the results
+ * file as soon as the case settles, with wall and CPU time for the case and
+ * the driver's peak RSS so far.
+ */
+'use strict';
+
+const fs = require('fs');
+const path = require('path');
+const util = require('util');
+const vm = require('vm');
+const { Module } = require('module');
+const { Readable } = require('stream');
+
+const [solutionFile, casesFile, resultsFile, timeoutArg] = process.argv.slice(2);
+const caseTimeoutMs = timeoutArg ? Number(timeoutArg) * 1000 : undefined;
+
+class ExitSignal {
+    constructor(code) {
+        this.code = code;
+    }
+}
+
+const source = fs.readFileSync(solutionFile, 'utf-8');
+const wrapper = new vm.Script(
+    '(function (exports, require, module, __filename, __dirname, process, console) {' +
+        source +
+        '\n})',
+    { filename: solutionFile }
+).runInThisContext();
+
+const baseRequire = Module.createRequire(solutionFile);
+let current = null;
+
+function makeCase(input) {
+    const state = { stdout: [], stderr: [], exitCode: 0 };
+
+    const stdin = new Readable({
+        read() {
+            this.push(Buffer.from(input));
+            this.push(null);
+        },
+    });
+    stdin.fd = 0;
+
+    const write = (chunks) => (chunk, encoding, callback) => {
+        chunks.push(typeof chunk === 'string' ? chunk : Buffer.from(chunk).toString());
+        const done = typeof encoding === 'function' ? encoding : callback;
+        if (done) done();
+        return true;
+    };
+
+    const fakeProcess = Object.create(process, {
+        stdin: { value: stdin },
+        stdout: { value: { write: write(state.stdout), isTTY: false } },
+        stderr: { value: { write: write(state.stderr), isTTY: false } },
+        argv: { value: [process.argv[0], solutionFile] },
+        exit: {
+            value: (code) => {
+                throw new ExitSignal(code === undefined ? state.exitCode : code);
+            },
+        },
+        exitCode: {
+            get: () => state.exitCode,
+            set: (code) => {
+                state.exitCode = code;
+            },
+        },
+    });
+
+    const format = (args) => util.format(...args) + '\n';
+    const fakeConsole = Object.assign(Object.create(console), {
+        log: (...args) => state.stdout.push(format(args)),
+        info: (...args) => state.stdout.push(format(args)),
+        error: (...args) => state.stderr.push(format(args)),
+        warn: (...args) => state.stderr.push(format(args)),
+    });
+
+    const fakeFs = Object.assign(Object.create(fs), {
+        readFileSync(file, options) {
+            if (file === 0 || file === '/dev/stdin') {
+                const encoding = typeof options === 'string' ? options : options && options.encoding;
+                return encoding ? input : Buffer.from(input);
+            }
+            return fs.readFileSync(file, options);
+        },
+    });
+
+    const caseRequire = (name) => (name === 'fs' ? fakeFs : baseRequire(name));
+
+    return { state, stdin, fakeProcess, fakeConsole, caseRequire };
+}
+
+function tick() {
+    return new Promise((resolve) => setImmediate(resolve));
+}
+
+async function settle(stdin) {
+    // Wait for stream-driven solutions to consume stdin and run their 'end'/'close' handlers
+    const listening = () =>
+        ['data', 'readable', 'end'].some((event) => stdin.listenerCount(event) > 0);
+    while (listening() && !stdin.readableEnded && !stdin.destroyed) {
+        await tick();
+    }
+    for (let i = 0; i < 3; i++) {
+        await tick();
+    }
+}
+
+function record(error, state) {
+    if (error instanceof ExitSignal) {
+        state.exitCode = error.code;
+    } else if (error) {
+        state.stderr.push((error && error.stack) || String(error));
+        state.exitCode = 1;
+    }
+}
+
+process.on('uncaughtException', (error) => {
+    if (current) record(error, current.state);
+});
+
+async function runCase(input) {
+    current = makeCase(input);
+    const { state, stdin, fakeProcess, fakeConsole, caseRequire } = current;
+    const module = { exports: {} };
+    let timedOut = false;
+
+    const cpuStart = process.cpuUsage();
+    const start = process.hrtime.bigint();
+    try {
+        const run = () =>
+            wrapper.call(
+                module.exports, module.exports, caseRequire, module,
+                solutionFile, path.dirname(solutionFile), fakeProcess, fakeConsole
+            );
+        if (caseTimeoutMs) {
+            // vm timeouts only cover code started from a script, so trampoline through one
+            globalThis.__batchCase = run;
+            vm.runInThisContext('__batchCase()', { timeout: caseTimeoutMs });
+        } else {
+            run();
+        }
+    } catch (error) {
+        if (error && error.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT') {
+            timedOut = true;
+        } else {
+            record(error, state);
+        }
+    }
+    if (!timedOut) await settle(stdin);
+    const elapsed = Number(process.hrtime.bigint() - start) / 1e6;
+    const cpu = process.cpuUsage(cpuStart);
+
+    current = null;
+    return {
+        stdout: state.stdout.join(''),
+        stderr: state.stderr.join(''),
+        exit_code: timedOut ? 124 : state.exitCode,
+        timed_out: timedOut,
+        execution_time_ms: elapsed,
+        cpu_time_ms: (cpu.user + cpu.system) / 1000,
+        memory_used_mb: process.resourceUsage().maxRSS / 1024,
+    };
+}
+
+async function main() {
+    const inputs = JSON.parse(fs.readFileSync(casesFile, 'utf-8'));
+    const out = fs.openSync(resultsFile, 'w');
+    for (const input of inputs) {
+        const result = await runCase(input);
+        fs.writeSync(out, JSON.stringify(result) + '\n');
+    }
+    fs.closeSync(out);
+}
+
+main();
@@ -0,0 +1,134 @@
+"""
+Python Batch Driver - runs one solution against every test input in one process
+
+Usage: python batch_driver.py <solution.py> <cases.json> <results.jsonl> [case_timeout]
+
+The solution is compiled once and executed with fresh globals per case,
+with stdout/stderr swapped for in-memory buffers. Stdin is read from a
+per-case temporary file duplicated onto fd 0, so sys.stdin, sys.stdin.buffer,
+open(0) and /dev/stdin all see the case input. Each case is timed
+internally, so execution_time_ms and cpu_time_ms measure the solution
+rather than process start-up; memory_used_mb is the driver's peak RSS so
+far. One JSON line per case is flushed to the results file as soon as the
+case finishes, so a crash or timeout still leaves the earlier results.
+"""
+
+import builtins
+import io
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+
+class CaseTimeout(BaseException):
+    """Raised inside the solution when its case runs out of time"""
+
+
+def _on_alarm(signum, frame):
+    raise CaseTimeout()
+
+
+def _arm(timeout: float):
+    if timeout and hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+
+def _disarm():
+    if hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _redirect_stdin(input_data: str):
+    """Point fd 0 at a file holding the input; returns a sys.stdin reading it"""
+    fd, path = tempfile.mkstemp(prefix="stdin-")
+    os.unlink(path)
+    os.write(fd, input_data.encode("utf-8"))
+    os.lseek(fd, 0, os.SEEK_SET)
+    # A solution's open(0) closes fd 0, so the new file may already be fd 0
+    if fd != 0:
+        os.dup2(fd, 0)
+        os.close(fd)
+    return io.TextIOWrapper(io.BufferedReader(io.FileIO(0, "r", closefd=False)), encoding="utf-8")
+
+
+def run_case(code, solution_file: str, input_data: str, timeout: float) -> dict:
+    """Execute the compiled solution once against one input"""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved = sys.stdin, sys.stdout, sys.stderr
+    sys.stdin, sys.stdout, sys.stderr = _redirect_stdin(input_data), stdout, stderr
+    sys.argv = [solution_file]
+
+    exit_code = 0
+    timed_out = False
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    try:
+        _arm(timeout)
+        exec(code, {"__name__": "__main__", "__file__": solution_file, "__builtins__": builtins})
+    except CaseTimeout:
+        timed_out = True
+        exit_code = -signal.SIGALRM if hasattr(signal, "SIGALRM") else 1
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=stderr)
+            exit_code = 1
+    except BaseException as e:
+        # Drop this driver's frame so the traceback starts in the solution
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next, file=stderr)
+        exit_code = 1
+    finally:
+        _disarm()
+        elapsed = (time.perf_counter() - start) * 1000
+        cpu_elapsed = (time.process_time() - cpu_start) * 1000
+        sys.stdin, sys.stdout, sys.stderr = saved
+
+    return {
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "exit_code": exit_code,
+        "timed_out": timed_out,
+        "execution_time_ms": elapsed,
+        "cpu_time_ms": cpu_elapsed,
+        "memory_used_mb": _peak_rss_mb()
+    }
+
+
+def main():
+    solution_file, cases_file, results_file = sys.argv[1:4]
+    timeout = float(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+    with open(solution_file) as f:
+        code = compile(f.read(), solution_file, "exec")
+    with open(cases_file) as f:
+        inputs = json.load(f)
+
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+    with open(results_file, "w") as results:
+        for input_data in inputs:
+            result = run_case(code, solution_file, input_data, timeout)
+            results.write(json.dumps(result) + "\n")
+            results.flush()
+
+
+if __name__ == "__main__":
+    main()
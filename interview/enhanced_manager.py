@@ -9,7 +9,8 @@ from enum import Enum
 import json
 
 from interview.simulation_engine import InterviewSimulationEngine, InterviewMode, CompanyRole
-from interview.compiler import CodeCompiler
+from interview.compiler import CodeCompiler, compiler_cases
+from interview.submission_queue import get_submission_scheduler
 from interview.scheduler import InterviewScheduler
 from maang_agent.memory_persistence import get_memory_manager
 from maang_agent.agent import get_mentor
@@ -26,6 +27,10 @@ class WhiteboardMode(Enum):
 class EnhancedInterviewManager:
     """Enhanced interview manager with AI agent integration and memory persistence"""
     
+    # Measured-cost thresholds used in coding feedback and optimization score
+    SLOW_CPU_MS_PER_CASE = 1000
+    HIGH_MEMORY_MB = 256
+    
     def __init__(self, user_id: str):
         self.user_id = user_id
         self.engine = InterviewSimulationEngine()
@@ -121,9 +126,15 @@ class EnhancedInterviewManager:
         code: str,
         language: str,
         test_inputs: Optional[List[str]] = None,
-        custom_input: Optional[str] = None
+        custom_input: Optional[str] = None,
+        submitter: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Submit code with compilation and testing, with optional custom input"""
+        """
+        Submit code with compilation and testing, with optional custom input
+        
+        submitter is the runner's fairness key (see request_submitter);
+        it defaults to the manager's user id.
+        """
         
         # Store submission
         self.memory_manager.store_conversation(
@@ -134,46 +145,51 @@ class EnhancedInterviewManager:
             metadata={'code_length': len(code), 'language': language, 'custom_input': custom_input is not None}
         )
         
-        # Compile and run
-        compile_result = self.compiler.compile_and_run(code, language, custom_input or "", stdin_input=bool(custom_input))
-        
-        if not compile_result.success:
-            # Store error
-            self.memory_manager.store_conversation(
-                user_id=self.user_id,
-                session_id=session_id,
-                role='assistant',
-                message=f'Compilation error: {compile_result.error}'
+        # Wait for a runner slot, then compile once; the same artifact serves
+        # the custom run and every test case
+        with get_submission_scheduler().slot(submitter or self.user_id), \
+                self.compiler.compile_session(code, language) as program:
+            compile_result = self.compiler.run_compiled(program, custom_input or "", stdin_input=bool(custom_input))
+            
+            if not compile_result.success:
+                # Store error
+                self.memory_manager.store_conversation(
+                    user_id=self.user_id,
+                    session_id=session_id,
+                    role='assistant',
+                    message=f'Compilation error: {compile_result.error}'
+                )
+                return {
+                    'success': False,
+                    'error': compile_result.error,
+                    'execution_time_ms': compile_result.execution_time_ms,
+                    'compile_time_ms': program.compile_time_ms
+                }
+            
+            # Test against cases (with custom input if provided)
+            # Get problem from current session
+            problem = None
+            if self.current_session:
+                problem_id = getattr(self.current_session, 'id', None) or str(self.current_session.get('problem_id', '')) if isinstance(self.current_session, dict) else None
+                if problem_id:
+                    problem = self.engine.get_coding_problem(problem_id)
+            
+            # If no problem found, use a default one for testing
+            if not problem:
+                problem = self.engine.get_coding_problem('two-sum')
+            
+            # Stored cases use input_data/expected_output; the compiler wants input/expected
+            if hasattr(problem, 'test_cases'):
+                test_cases = compiler_cases(problem.test_cases)
+            elif isinstance(problem, dict):
+                test_cases = compiler_cases(problem.get('test_cases', []))
+            else:
+                test_cases = []
+            
+            test_results = self.compiler.test_against_cases(
+                code, language, test_cases, custom_input=custom_input, program=program,
+                parallel=True, batch=True, problem_id=getattr(problem, 'id', None)
             )
-            return {
-                'success': False,
-                'error': compile_result.error,
-                'execution_time_ms': compile_result.execution_time_ms
-            }
-        
-        # Test against cases (with custom input if provided)
-        # Get problem from current session
-        problem = None
-        if self.current_session:
-            problem_id = getattr(self.current_session, 'id', None) or str(self.current_session.get('problem_id', '')) if isinstance(self.current_session, dict) else None
-            if problem_id:
-                problem = self.engine.get_coding_problem(problem_id)
-        
-        # If no problem found, use a default one for testing
-        if not problem:
-            problem = self.engine.get_coding_problem('two-sum')
-        
-        # Convert problem to dict if it's a CodingProblem object
-        if hasattr(problem, 'test_cases'):
-            test_cases = [tc.to_dict() if hasattr(tc, 'to_dict') else tc for tc in problem.test_cases]
-        elif isinstance(problem, dict):
-            test_cases = problem.get('test_cases', [])
-        else:
-            test_cases = []
-        
-        test_results = self.compiler.test_against_cases(
-            code, language, test_cases, custom_input=custom_input
-        )
         
         # Analyze code quality
         complexity = self.compiler.analyze_code_complexity(code, language)
@@ -246,6 +262,7 @@ class EnhancedInterviewManager:
             'success': True,
             'test_results': test_results,
             'execution_time_ms': compile_result.execution_time_ms,
+            'compile_time_ms': compile_result.compile_time_ms,
             'output': compile_result.output,
             'complexity_analysis': complexity.__dict__,
             'ai_feedback': feedback,
@@ -264,12 +281,24 @@ class EnhancedInterviewManager:
         
         passed = test_results.get('passed_count', 0)
         total = test_results.get('total_count', 0)
+        cpu_time_ms = test_results.get('total_cpu_time_ms', compile_result.cpu_time_ms)
+        peak_memory_mb = test_results.get('peak_memory_mb', compile_result.memory_used_mb)
+        # Batch runs only know the driver's peak RSS (interpreter plus every case), so it
+        # is reported as such and never judged against HIGH_MEMORY_MB
+        batch_peak_mb = test_results.get('batch_process_peak_mb', 0)
+        if peak_memory_mb:
+            memory_line = f"Peak memory: {peak_memory_mb:.1f} MB"
+        else:
+            memory_line = f"Batch process peak RSS (interpreter and all cases): {batch_peak_mb:.1f} MB"
         
         # Build feedback context for AI agent
         feedback_context = {
             'test_results': test_results,
             'complexity': complexity.__dict__ if hasattr(complexity, '__dict__') else str(complexity),
             'execution_time_ms': compile_result.execution_time_ms,
+            'cpu_time_ms': cpu_time_ms,
+            'peak_memory_mb': peak_memory_mb,
+            'batch_process_peak_mb': batch_peak_mb,
             'code_length': len(code),
             'language': 'python'  # Could be passed as parameter
         }
@@ -279,6 +308,8 @@ class EnhancedInterviewManager:
         Code Review:
         - Test cases: {passed}/{total} passed
         - Execution time: {compile_result.execution_time_ms}ms
+        - CPU time (all test cases): {cpu_time_ms:.1f}ms
+        - {memory_line}
         - Complexity: {complexity.__dict__ if hasattr(complexity, '__dict__') else str(complexity)}
         
         Provide constructive feedback on this code submission.
@@ -312,7 +343,12 @@ class EnhancedInterviewManager:
             message_parts.append("Your solution uses sorting. ")
             suggestions.append("Verify if sorting is necessary or if a hash map approach is better")
         
+        if peak_memory_mb >= self.HIGH_MEMORY_MB:
+            message_parts.append("Your solution uses a lot of memory. ")
+            suggestions.append("Look for auxiliary structures you can drop or reuse to cut peak memory")
+        
         message_parts.append(f"Execution time: {compile_result.execution_time_ms}ms. ")
+        message_parts.append(f"CPU time: {cpu_time_ms:.1f}ms. {memory_line}. ")
         
         # Combine AI feedback with structured feedback
         combined_message = ''.join(message_parts) + "\n\nAI Feedback: " + ai_feedback_message
@@ -334,6 +370,21 @@ class EnhancedInterviewManager:
         if test_results.get('passed_count', 0) < test_results.get('total_count', 1):
             score -= 20
         
+        # Deduct for measured cost per test case
+        total = max(test_results.get('total_count', 0), 1)
+        cpu_per_case_ms = test_results.get('total_cpu_time_ms', 0) / total
+        if cpu_per_case_ms >= self.SLOW_CPU_MS_PER_CASE:
+            score -= 10
+        elif cpu_per_case_ms >= self.SLOW_CPU_MS_PER_CASE / 5:
+            score -= 5
+        
+        # Per-process runs only; batch_process_peak_mb is not the solution's own memory
+        peak_memory_mb = test_results.get('peak_memory_mb', 0)
+        if peak_memory_mb >= self.HIGH_MEMORY_MB:
+            score -= 10
+        elif peak_memory_mb >= self.HIGH_MEMORY_MB / 2:
+            score -= 5
+        
         # Deduct for complexity issues
         if complexity.nested_loops >= 3:
             score -= 15
@@ -0,0 +1,138 @@
+"""
+Execution Stats - bounded run history and rolling per-language aggregates
+
+Every sandboxed run and every compile is recorded here instead of in an
+ever-growing list on each CodeCompiler. The history is a ring buffer of the
+most recent runs; aggregates (count, success rate, p50/p95/p99 execution
+and compile time) are computed over a fixed window per language, so memory
+stays flat however long the process lives.
+"""
+
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    """Average and nearest-rank percentiles of a sample window"""
+    if not samples:
+        return {"avg": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "avg": sum(ordered) / len(ordered),
+        "p50": ordered[int(0.50 * last)],
+        "p95": ordered[int(0.95 * last)],
+        "p99": ordered[int(0.99 * last)],
+        "max": ordered[last]
+    }
+
+
+class _LanguageWindow:
+    """Recent samples and lifetime counters for one language"""
+
+    def __init__(self, window_size: int):
+        self.runs = 0
+        self.successes = 0
+        self.timeouts = 0
+        self.compiles = 0
+        self.compile_failures = 0
+        self.run_samples = deque(maxlen=window_size)
+        self.compile_samples = deque(maxlen=window_size)
+
+
+class ExecutionStats:
+    """Ring buffer of recent runs plus rolling per-language percentiles"""
+
+    def __init__(self, history_size: int = 1000, window_size: int = 1000):
+        self.history_size = history_size
+        self.window_size = window_size
+        self._history = deque(maxlen=history_size)
+        self._languages: Dict[str, _LanguageWindow] = defaultdict(lambda: _LanguageWindow(self.window_size))
+        self._lock = threading.Lock()
+
+    def record_run(self, language: str, code_hash: str, result: Any):
+        """Record one finished run (an ExecutionResult)"""
+        with self._lock:
+            self._history.append({
+                "timestamp": datetime.now().isoformat(),
+                "language": language,
+                "code_hash": code_hash,
+                "result": {
+                    "success": result.success,
+                    "execution_time_ms": result.execution_time_ms
+                }
+            })
+
+            window = self._languages[language]
+            window.runs += 1
+            window.successes += 1 if result.success else 0
+            window.timeouts += 1 if result.timed_out else 0
+            window.run_samples.append((result.success, result.execution_time_ms,
+                                       result.cpu_time_ms, result.memory_used_mb))
+
+    def record_compile(self, language: str, compile_time_ms: float, success: bool):
+        """Record one compile step (including artifact cache restores)"""
+        with self._lock:
+            window = self._languages[language]
+            window.compiles += 1
+            window.compile_failures += 0 if success else 1
+            window.compile_samples.append(compile_time_ms)
+
+    def history(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Most recent runs, oldest first"""
+        with self._lock:
+            entries = list(self._history)
+        return entries[-limit:] if limit else entries
+
+    def stats(self, language: Optional[str] = None) -> Dict[str, Any]:
+        """Per-language aggregates; counts are lifetime, percentiles cover the window"""
+        with self._lock:
+            names = [language] if language else sorted(self._languages)
+            languages = {}
+            for name in names:
+                if name not in self._languages:
+                    continue
+                window = self._languages[name]
+                samples = list(window.run_samples)
+                languages[name] = {
+                    "runs": window.runs,
+                    "success_rate": (window.successes / window.runs) if window.runs else 0.0,
+                    "timeouts": window.timeouts,
+                    "window_runs": len(samples),
+                    "window_success_rate": (sum(1 for s in samples if s[0]) / len(samples)) if samples else 0.0,
+                    "execution_time_ms": _summarize([s[1] for s in samples]),
+                    "cpu_time_ms": _summarize([s[2] for s in samples]),
+                    "peak_memory_mb": max((s[3] for s in samples), default=0.0),
+                    "compiles": window.compiles,
+                    "compile_failures": window.compile_failures,
+                    "compile_time_ms": _summarize(list(window.compile_samples))
+                }
+
+            return {
+                "history_size": self.history_size,
+                "window_size": self.window_size,
+                "history_entries": len(self._history),
+                "languages": languages
+            }
+
+    def clear(self):
+        with self._lock:
+            self._history.clear()
+            self._languages.clear()
+
+
+# Global instance
+_execution_stats: Optional[ExecutionStats] = None
+_execution_stats_lock = threading.Lock()
+
+
+def get_execution_stats(history_size: int = 1000, window_size: int = 1000) -> ExecutionStats:
+    """Get or create the process-wide execution stats shared by every CodeCompiler"""
+    global _execution_stats
+    with _execution_stats_lock:
+        if _execution_stats is None:
+            _execution_stats = ExecutionStats(history_size=history_size, window_size=window_size)
+    return _execution_stats
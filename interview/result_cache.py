@@ -0,0 +1,156 @@
+"""
+Judged Result Cache - memoized runs for (code, language, test input, expected)
+
+Resubmitting identical code against the same test case returns the stored
+ExecutionResult instead of running the sandbox again. Code is normalized
+first so edits that only touch comments or whitespace still hit. Keys
+include the test input, the expected output and the run limits (memory,
+timeout, output cap), so a changed case or a stricter sandbox simply
+misses; tracking a problem's suite fingerprint additionally drops its old
+entries as soon as its test cases change. Results with stderr (runtime
+errors, tracebacks) are not stored: their line numbers would go stale
+after a comment-only edit.
+"""
+
+import ast
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set
+
+
+# Strings are matched first so comment markers inside them survive
+_C_LIKE_TOKENS = re.compile(
+    r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`(?:\\.|[^`\\])*`)'
+    r'|(//[^\n]*|/\*.*?\*/)',
+    re.DOTALL
+)
+
+
+def normalize_code(code: str, language: str) -> str:
+    """Canonical form of code that ignores comments and formatting"""
+    if language == "python":
+        try:
+            # Comments and layout do not survive parsing
+            return ast.dump(ast.parse(code))
+        except (SyntaxError, ValueError):
+            return code
+
+    parts = []
+    position = 0
+    for match in _C_LIKE_TOKENS.finditer(code):
+        parts.append(_normalize_whitespace(code[position:match.start()]))
+        parts.append(match.group(1) if match.group(1) else " ")
+        position = match.end()
+    parts.append(_normalize_whitespace(code[position:]))
+    return "".join(parts).strip()
+
+
+def _normalize_whitespace(segment: str) -> str:
+    # Newlines are kept: they end preprocessor directives and ASI statements
+    segment = re.sub(r"[ \t\r\f\v]+", " ", segment)
+    return re.sub(r" ?\n[ \n]*", "\n", segment)
+
+
+class ResultCache:
+    """In-process LRU of ExecutionResults for judged test cases"""
+
+    # Large outputs are cheap to regenerate relative to the memory they pin
+    MAX_CACHED_OUTPUT_CHARS = 64 * 1024
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._problem_keys: Dict[str, Set[str]] = {}
+        self._problem_suites: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(normalized_code: str, language: str, input_data: str, expected: str,
+                 limits: Optional[Dict[str, Any]] = None) -> str:
+        """limits are the sandbox settings the verdict was judged under"""
+        material = json.dumps([normalized_code, language, input_data, expected, limits or {}],
+                              sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: str, result: Any, problem_id: Optional[str] = None):
+        if len(result.output) + len(result.error) > self.MAX_CACHED_OUTPUT_CHARS:
+            return
+        # A timeout's message is fixed; any other stderr may point into the source
+        if result.error and not result.timed_out:
+            return
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            if problem_id:
+                self._problem_keys.setdefault(problem_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def track_suite(self, problem_id: str, test_cases: List[Dict[str, str]]):
+        """Drop a problem's cached results when its test cases change"""
+        fingerprint = hashlib.sha256(json.dumps(
+            [[tc.get("input", ""), tc.get("expected", "")] for tc in test_cases]
+        ).encode()).hexdigest()
+
+        with self._lock:
+            previous = self._problem_suites.get(problem_id)
+            self._problem_suites[problem_id] = fingerprint
+            if previous is not None and previous != fingerprint:
+                self._invalidate_locked(problem_id)
+
+    def invalidate_problem(self, problem_id: str):
+        with self._lock:
+            self._invalidate_locked(problem_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._problem_keys.clear()
+            self._problem_suites.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0
+        }
+
+    def _invalidate_locked(self, problem_id: str):
+        for key in self._problem_keys.pop(problem_id, set()):
+            self._entries.pop(key, None)
+
+
+# Global instance
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache(max_entries: int = 10000) -> Optional[ResultCache]:
+    """Get or create the shared result cache; None if max_entries is 0"""
+    global _result_cache
+    if max_entries <= 0:
+        return None
+
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(max_entries=max_entries)
+    return _result_cache
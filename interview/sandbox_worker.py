@@ -0,0 +1,196 @@
+"""
+Warm Python Sandbox Worker - long-lived interpreter that forks one child per run
+
+Started by interview.worker_pool.WarmPythonPool. Speaks line-delimited JSON:
+each request names either a Python solution file or a command line (argv),
+its working directory, stdin and limits; each response carries stdout,
+stderr, exit code, timing and rusage. The interpreter start-up cost is paid
+once per worker, and every run still gets a fresh, isolated process via
+fork(). Because the worker is small, peak RSS reported for exec'd commands
+is not inflated by the (much larger) web process that asked for the run.
+"""
+
+import io
+import json
+import math
+import os
+import runpy
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+
+def _apply_limits(request: dict):
+    """Per-run resource limits, applied inside the forked child"""
+    try:
+        import resource
+    except ImportError:
+        return
+
+    memory_mb = request.get("memory_mb")
+    if memory_mb:
+        limit = int(memory_mb) * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+
+    timeout = request.get("cpu_seconds") or request.get("timeout")
+    if timeout:
+        seconds = int(math.ceil(timeout))
+        try:
+            resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+        except (ValueError, OSError):
+            pass
+
+    # stdout/stderr are files here, so this also caps captured output
+    max_output_bytes = request.get("max_output_bytes")
+    if max_output_bytes:
+        try:
+            resource.setrlimit(resource.RLIMIT_FSIZE, (max_output_bytes, max_output_bytes))
+        except (ValueError, OSError):
+            pass
+
+
+def _redirect(fd: int, path: str, flags: int):
+    target = os.open(path, flags, 0o600)
+    os.dup2(target, fd)
+    os.close(target)
+
+
+def _run_child(request: dict, stdin_path: str, stdout_path: str, stderr_path: str):
+    """Body of the forked child; never returns"""
+    exit_code = 1
+    try:
+        _redirect(0, stdin_path, os.O_RDONLY)
+        _redirect(1, stdout_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+        _redirect(2, stderr_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+
+        if "argv" in request:
+            os.chdir(request["cwd"])
+            _apply_limits(request)
+            try:
+                os.execvp(request["argv"][0], request["argv"])
+            except OSError as e:
+                os.write(2, f"{request['argv'][0]}: {e.strerror}\n".encode())
+                exit_code = 127
+                return
+
+        sys.stdin = io.TextIOWrapper(io.FileIO(0, "r", closefd=False))
+        sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False))
+        sys.stderr = io.TextIOWrapper(io.FileIO(2, "w", closefd=False), write_through=True)
+
+        os.chdir(request["cwd"])
+        sys.argv = [request["file"]]
+        sys.path[0] = request["cwd"]
+        _apply_limits(request)
+
+        try:
+            runpy.run_path(request["file"], run_name="__main__")
+            exit_code = 0
+        except SystemExit as e:
+            if e.code is None:
+                exit_code = 0
+            elif isinstance(e.code, int):
+                exit_code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+        except BaseException as e:
+            # Hide the runpy frames so tracebacks match a plain `python solution.py`
+            tb = e.__traceback__
+            while tb is not None and tb.tb_frame.f_code.co_filename != request["file"]:
+                tb = tb.tb_next
+            traceback.print_exception(type(e), e, tb)
+            exit_code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except Exception:
+            pass
+        os._exit(exit_code & 0xFF)
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path, "r", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def handle(request: dict) -> dict:
+    """Run one solution in a forked child and collect its result"""
+    work_dir = tempfile.mkdtemp(prefix="stdio_")
+    stdin_path = os.path.join(work_dir, "stdin")
+    stdout_path = os.path.join(work_dir, "stdout")
+    stderr_path = os.path.join(work_dir, "stderr")
+
+    try:
+        with open(stdin_path, "w") as f:
+            f.write(request.get("stdin") or "")
+
+        timeout = request.get("timeout") or 30
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            _run_child(request, stdin_path, stdout_path, stderr_path)
+
+        timed_out = False
+        deadline = start + timeout
+        while True:
+            waited, status, usage = os.wait4(pid, os.WNOHANG)
+            if waited:
+                break
+            if time.perf_counter() > deadline:
+                os.kill(pid, signal.SIGKILL)
+                _, status, usage = os.wait4(pid, 0)
+                timed_out = True
+                break
+            time.sleep(0.001)
+
+        elapsed = (time.perf_counter() - start) * 1000
+
+        return {
+            "stdout": _read(stdout_path),
+            "stderr": _read(stderr_path),
+            "exit_code": os.waitstatus_to_exitcode(status),
+            "timed_out": timed_out,
+            "execution_time_ms": elapsed,
+            "cpu_time_ms": (usage.ru_utime + usage.ru_stime) * 1000,
+            # ru_maxrss is kilobytes on Linux and bytes on macOS
+            "memory_used_mb": usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    """Serve requests until the pool closes our stdin"""
+    proto_in = sys.stdin.buffer
+    proto_out = sys.stdout.buffer
+
+    # Anything user code inherits must not be able to corrupt the protocol
+    sys.stdin = open(os.devnull, "r")
+    sys.stdout = open(os.devnull, "w")
+
+    while True:
+        line = proto_in.readline()
+        if not line:
+            break
+
+        try:
+            response = handle(json.loads(line))
+        except Exception as e:
+            response = {"worker_error": str(e)}
+
+        proto_out.write(json.dumps(response).encode() + b"\n")
+        proto_out.flush()
+
+
+if __name__ == "__main__":
+    main()
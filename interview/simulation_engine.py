@@ -356,10 +356,12 @@ class InterviewSimulationEngine:
         }
     
     def submit_code(self, session_id: int, user_id: str, code: str, 
-                   language: str, test_cases: List[TestCase]) -> Dict[str, Any]:
-        """Submit code for testing"""
+                   language: str, test_cases: List[TestCase],
+                   validation: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Submit code for testing; pass validation to store results judged elsewhere"""
         # Validate code
-        validation = self.validate_code(code, language, test_cases)
+        if validation is None:
+            validation = self.validate_code(code, language, test_cases)
         
         # Store submission
         conn = sqlite3.connect(self.db_path)
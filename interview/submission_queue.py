@@ -0,0 +1,207 @@
+"""
+Submission Scheduler - admission control and fair queueing for the code runner
+
+Every code run (dashboard "Run", interview submit, Socket.IO submission)
+takes a slot here before it touches CodeCompiler. At most
+MAX_CONCURRENT_INTERVIEWS submissions execute at once; the rest wait in
+per-user queues that are served round-robin, preferring users with the
+fewest runs in flight. When the queue is full, a user already has too
+many submissions waiting, or a wait times out, SubmissionRejected tells
+the caller to back off and retry. Web callers are keyed by
+request_submitter(), never by a user id taken from the request body.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, Iterator, Optional
+
+from interview.compiler import _setting
+
+
+def request_submitter(req) -> str:
+    """Fairness key for a Flask or Socket.IO request: the bearer token's user, else the client address"""
+    token = req.headers.get('Authorization', '')
+    if token.startswith('Bearer '):
+        token = token[7:]
+    if token:
+        from services.auth_service import get_user_from_token
+        user_id = get_user_from_token(token)
+        if user_id:
+            return f"user:{user_id}"
+    # Anonymous callers are told apart by address rather than sharing one queue
+    return f"anon:{req.remote_addr or 'unknown'}"
+
+
+class SubmissionRejected(Exception):
+    """The runner is saturated; retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Ticket:
+    user_id: str
+    enqueued_at: float = field(default_factory=time.time)
+    admitted_at: float = 0
+    admitted: threading.Event = field(default_factory=threading.Event)
+
+
+class SubmissionScheduler:
+    """Global concurrency cap with per-user fair queueing"""
+
+    def __init__(self, max_concurrent: int = 10, max_queue_depth: int = 100,
+                 max_queued_per_user: int = 3, queue_timeout_seconds: float = 60):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue_depth = max_queue_depth
+        self.max_queued_per_user = max_queued_per_user
+        self.queue_timeout_seconds = queue_timeout_seconds
+
+        self._lock = threading.Lock()
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._queued = 0
+        self._running = 0
+        self._running_by_user: Dict[str, int] = defaultdict(int)
+
+        self._admitted_total = 0
+        self._rejected_total = 0
+        self._timed_out_total = 0
+        self._max_queue_depth_seen = 0
+        self._wait_ms = deque(maxlen=500)
+        self._service_ms = deque(maxlen=500)
+
+    @contextmanager
+    def slot(self, user_id: str) -> Iterator[None]:
+        """Hold one runner slot for the duration of the block"""
+        ticket = self._admit(user_id)
+        try:
+            yield
+        finally:
+            self._release(ticket)
+
+    def run(self, user_id: str, fn: Callable, *args, **kwargs) -> Any:
+        """Call fn once a slot is free"""
+        with self.slot(user_id):
+            return fn(*args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and admission metrics"""
+        with self._lock:
+            wait_ms = sorted(self._wait_ms)
+            return {
+                "running": self._running,
+                "queued": self._queued,
+                "queued_by_user": {user: len(q) for user, q in self._queues.items()},
+                "max_concurrent": self.max_concurrent,
+                "max_queue_depth": self.max_queue_depth,
+                "max_queue_depth_seen": self._max_queue_depth_seen,
+                "admitted_total": self._admitted_total,
+                "rejected_total": self._rejected_total,
+                "timed_out_total": self._timed_out_total,
+                "avg_wait_ms": (sum(wait_ms) / len(wait_ms)) if wait_ms else 0.0,
+                "p95_wait_ms": wait_ms[int(0.95 * (len(wait_ms) - 1))] if wait_ms else 0.0
+            }
+
+    def _admit(self, user_id: str) -> _Ticket:
+        ticket = _Ticket(user_id=user_id)
+
+        with self._lock:
+            if self._running < self.max_concurrent and not self._queued:
+                self._start(ticket)
+                return ticket
+
+            if self._queued >= self.max_queue_depth:
+                self._rejected_total += 1
+                raise SubmissionRejected("Code runner is busy, please retry shortly",
+                                         retry_after=self._retry_after())
+
+            if len(self._queues.get(user_id, ())) >= self.max_queued_per_user:
+                self._rejected_total += 1
+                raise SubmissionRejected("Too many pending submissions for this user",
+                                         retry_after=self._retry_after())
+
+            self._queues.setdefault(user_id, deque()).append(ticket)
+            self._queued += 1
+            self._max_queue_depth_seen = max(self._max_queue_depth_seen, self._queued)
+
+        if ticket.admitted.wait(self.queue_timeout_seconds):
+            return ticket
+
+        with self._lock:
+            # Admission may have raced with the timeout
+            if ticket.admitted.is_set():
+                return ticket
+
+            user_queue = self._queues.get(user_id)
+            if user_queue is not None:
+                user_queue.remove(ticket)
+                if not user_queue:
+                    del self._queues[user_id]
+            self._queued -= 1
+            self._timed_out_total += 1
+            raise SubmissionRejected("Timed out waiting for a free code runner",
+                                     retry_after=self._retry_after())
+
+    def _release(self, ticket: _Ticket):
+        with self._lock:
+            self._service_ms.append((time.time() - ticket.admitted_at) * 1000)
+            self._running -= 1
+            self._running_by_user[ticket.user_id] -= 1
+            if self._running_by_user[ticket.user_id] <= 0:
+                del self._running_by_user[ticket.user_id]
+            self._dispatch()
+
+    def _start(self, ticket: _Ticket):
+        """Mark a ticket as running; caller holds the lock"""
+        ticket.admitted_at = time.time()
+        self._running += 1
+        self._running_by_user[ticket.user_id] += 1
+        self._admitted_total += 1
+        self._wait_ms.append((ticket.admitted_at - ticket.enqueued_at) * 1000)
+        ticket.admitted.set()
+
+    def _dispatch(self):
+        """Hand free slots to waiting users; caller holds the lock"""
+        while self._running < self.max_concurrent and self._queues:
+            # Fewest runs in flight wins; ties go to whoever is next in round-robin order
+            user_id = min(self._queues, key=lambda user: self._running_by_user.get(user, 0))
+            user_queue = self._queues[user_id]
+            ticket = user_queue.popleft()
+            self._queued -= 1
+
+            if user_queue:
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+
+            self._start(ticket)
+
+    def _retry_after(self) -> int:
+        """Rough seconds until a queued submission would get a slot"""
+        service_ms = (sum(self._service_ms) / len(self._service_ms)) if self._service_ms else 1000
+        waves = (self._queued + 1) / self.max_concurrent
+        return max(1, int(math.ceil(waves * service_ms / 1000)))
+
+
+# Global instance
+_scheduler: Optional[SubmissionScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_submission_scheduler() -> SubmissionScheduler:
+    """Get or create the process-wide submission scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SubmissionScheduler(
+                max_concurrent=_setting('MAX_CONCURRENT_INTERVIEWS', 10),
+                max_queue_depth=_setting('SUBMISSION_QUEUE_MAX_DEPTH', 100),
+                max_queued_per_user=_setting('SUBMISSION_QUEUE_MAX_PER_USER', 3),
+                queue_timeout_seconds=_setting('SUBMISSION_QUEUE_TIMEOUT', 60, cast=float)
+            )
+    return _scheduler
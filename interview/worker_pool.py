@@ -0,0 +1,221 @@
+"""
+Warm Python Worker Pool - pre-started interpreters for the interview sandbox
+
+Each worker is a long-lived `python sandbox_worker.py` process that forks a
+fresh child per run, so a Python submission no longer pays interpreter
+start-up on every "Run". Workers also launch other sandboxed commands
+(compiled binaries, node, the batch drivers) so their rlimits and rusage
+are applied from a small process. Workers are recycled after a fixed
+number of runs or as soon as one misbehaves.
+
+Nothing is spawned until the first run or an explicit start(), so merely
+importing a module that builds a CodeCompiler costs no processes; the
+dashboard calls start() once at app startup.
+"""
+
+import atexit
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+
+
+class _Worker:
+    """One warm interpreter and its request pipe"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-u", WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self.runs = 0
+
+    def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.process.stdin.write(json.dumps(payload).encode() + b"\n")
+        self.process.stdin.flush()
+
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("Sandbox worker exited")
+
+        response = json.loads(line)
+        if "worker_error" in response:
+            raise RuntimeError(response["worker_error"])
+        return response
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except Exception:
+            pass
+
+
+class WarmPythonPool:
+    """
+    Fixed-size pool of warm Python sandbox workers
+
+    run() returns a plain dict (stdout, stderr, exit_code, timed_out,
+    execution_time_ms, cpu_time_ms, memory_used_mb) that CodeCompiler
+    turns into an ExecutionResult.
+    """
+
+    def __init__(self, size: int = 4, max_runs_per_worker: int = 100, acquire_timeout: float = 60):
+        self.size = max(1, size)
+        self.max_runs_per_worker = max(1, max_runs_per_worker)
+        # Longest a request waits for a free worker before failing
+        self.acquire_timeout = acquire_timeout
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._spawned = 0
+        self._closed = False
+
+    def start(self):
+        """Pre-fork every worker so the first requests are already warm"""
+        with self._lock:
+            missing = self.size - self._spawned
+            self._spawned += missing
+        for _ in range(missing):
+            self._idle.put(_Worker())
+
+    def run(self, code_file: str, cwd: str, input_data: str = "",
+            timeout: float = 30, memory_mb: Optional[int] = None,
+            max_output_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """Run a Python solution file on a warm worker"""
+        return self._request({
+            "file": code_file,
+            "cwd": cwd,
+            "stdin": input_data,
+            "timeout": timeout,
+            "memory_mb": memory_mb,
+            "max_output_bytes": max_output_bytes
+        })
+
+    def exec_command(self, argv: List[str], cwd: str, input_data: str = "",
+                     timeout: float = 30, cpu_seconds: Optional[float] = None,
+                     memory_mb: Optional[int] = None,
+                     max_output_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """Fork+exec an arbitrary sandboxed command from a worker"""
+        return self._request({
+            "argv": argv,
+            "cwd": cwd,
+            "stdin": input_data,
+            "timeout": timeout,
+            "cpu_seconds": cpu_seconds,
+            "memory_mb": memory_mb,
+            "max_output_bytes": max_output_bytes
+        })
+
+    def _request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        worker = self._acquire()
+
+        try:
+            response = worker.request(payload)
+        except (OSError, ValueError, RuntimeError) as e:
+            self._retire(worker)
+            raise RuntimeError(f"Sandbox worker crashed: {e}")
+
+        worker.runs += 1
+        if worker.runs >= self.max_runs_per_worker or not worker.alive():
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+
+        return response
+
+    def shutdown(self):
+        """Stop every idle worker; busy ones are retired when they return"""
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.close()
+            with self._lock:
+                self._spawned -= 1
+
+    def _acquire(self) -> _Worker:
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                can_spawn = self._spawned < self.size
+                if can_spawn:
+                    self._spawned += 1
+
+            if can_spawn:
+                try:
+                    return _Worker()
+                except Exception:
+                    with self._lock:
+                        self._spawned -= 1
+                    raise
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"No sandbox worker available after {self.acquire_timeout}s")
+            # Wake up periodically: a failed replenish frees a slot without queueing a worker
+            try:
+                return self._idle.get(timeout=min(remaining, 0.5))
+            except queue.Empty:
+                continue
+
+    def _retire(self, worker: _Worker):
+        worker.close()
+        with self._lock:
+            self._spawned -= 1
+
+        # Replace the worker off the request path so the pool stays warm
+        if not self._closed:
+            threading.Thread(target=self._replenish, daemon=True).start()
+
+    def _replenish(self):
+        with self._lock:
+            if self._closed or self._spawned >= self.size:
+                return
+            self._spawned += 1
+        try:
+            self._idle.put(_Worker())
+        except Exception:
+            with self._lock:
+                self._spawned -= 1
+
+
+# Global instance
+_python_pool: Optional[WarmPythonPool] = None
+_python_pool_lock = threading.Lock()
+
+
+def get_python_worker_pool(size: int = 4, max_runs_per_worker: int = 100,
+                           acquire_timeout: float = 60) -> Optional[WarmPythonPool]:
+    """
+    Get or create the shared warm Python pool; workers start on first use.
+    Returns None where fork() is unavailable (e.g. Windows) or size is 0.
+    """
+    global _python_pool
+    if not hasattr(os, "fork") or size <= 0:
+        return None
+
+    with _python_pool_lock:
+        if _python_pool is None:
+            _python_pool = WarmPythonPool(size=size, max_runs_per_worker=max_runs_per_worker,
+                                          acquire_timeout=acquire_timeout)
+            atexit.register(_python_pool.shutdown)
+    return _python_pool
@@ -6,6 +6,7 @@ from pathlib import Path
 from google.adk.agents.llm_agent import Agent
 from google.adk.tools.mcp_tool import MCPToolset, StreamableHTTPConnectionParams
 from maang_agent.memory_persistence import get_memory_manager
+from maang_agent.conversation_backup import get_conversation_backup
 from typing import Optional, Dict, List, Any
 
 INSTR = """
@@ -72,6 +73,7 @@ class MaangMentorWithMemory:
         self.agent = None
         self.user_data_dir = Path("userData")
         self.user_data_dir.mkdir(exist_ok=True)
+        self.conversation_backup = get_conversation_backup(self.memory_manager, str(self.user_data_dir))
         self._init_agent()
     
     def _init_agent(self):
@@ -706,36 +708,9 @@ What would you like to work on today?"""
     
     
     def _backup_conversation_to_json(self):
-        """Backup conversation history to userData directory as JSON"""
+        """Queue new messages for the background JSONL backup in userData"""
         try:
-            history = self.memory_manager.get_conversation_history(
-                user_id=self.user_id,
-                session_id=self.current_session_id,
-                limit=1000
-            )
-            
-            backup_file = self.user_data_dir / f"{self.user_id}_conversation_backup.json"
-            
-            # Load existing backup if it exists
-            existing_data = []
-            if backup_file.exists():
-                try:
-                    with open(backup_file, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
-                except:
-                    existing_data = []
-            
-            # Merge with new history (avoid duplicates)
-            existing_ids = {msg.get('id') for msg in existing_data if 'id' in msg}
-            new_messages = [msg for msg in history if msg.get('id') not in existing_ids]
-            
-            # Update backup
-            updated_data = existing_data + new_messages
-            
-            # Save backup
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(updated_data, f, indent=2, default=str)
-                
+            self.conversation_backup.request(self.user_id)
         except Exception as e:
             # Silently fail backup - don't break main functionality
             pass
@@ -0,0 +1,270 @@
+"""
+Append-only JSONL backup of agent conversations in userData/
+
+Each user has <user>_conversation_backup.jsonl, one message per line, and
+a <user>_conversation_backup.hwm file with the id of the last message
+written. After a message is stored, the mentor only marks the user dirty;
+a background flusher wakes every flush_interval seconds, reads the
+messages above the high-water mark from SQLite in id order, appends them
+in one write, and then advances the mark. The work per flush is
+proportional to the new messages, not to the history.
+
+A crash between the append and the mark update replays those lines on the
+next flush. Compaction rewrites the live file de-duplicated by id every
+compact_every flushes. A live file over max_file_bytes is compacted and
+rotated to <user>_conversation_backup.<timestamp>-<seq>.jsonl, where seq
+keeps segments from the same second apart. A legacy
+<user>_conversation_backup.json array is imported once, on the user's
+first flush, and then renamed to .json.imported.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationBackup:
+    """Batched background JSONL backups with a persisted high-water mark"""
+
+    def __init__(self, memory_manager, user_data_dir: str = "userData", flush_interval: float = 2.0,
+                 max_file_bytes: int = 10 * 1024 * 1024, compact_every: int = 100,
+                 max_rotated: Optional[int] = None, batch_size: int = 1000):
+        self.memory_manager = memory_manager
+        self.user_data_dir = Path(user_data_dir)
+        self.user_data_dir.mkdir(exist_ok=True)
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.compact_every = compact_every
+        self.max_rotated = max_rotated
+        self.batch_size = batch_size
+        self.flushes = 0
+        self.lines_written = 0
+        self.compactions = 0
+        self.rotations = 0
+        self._dirty: Set[str] = set()
+        self._flush_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def request(self, user_id: str):
+        """Mark a user's backup stale; the flusher picks it up shortly"""
+        with self._lock:
+            self._dirty.add(user_id)
+        self._ensure_started()
+
+    def flush(self, user_id: str = None) -> int:
+        """Write pending messages now, for one user or every dirty one; returns lines written"""
+        with self._lock:
+            if user_id is None:
+                users, self._dirty = self._dirty, set()
+            else:
+                users = {user_id}
+                self._dirty.discard(user_id)
+        if users:
+            # Messages still in the write-behind queue have no id to read by yet
+            self.memory_manager.flush_writes()
+        
+        written = 0
+        for user in users:
+            try:
+                written += self._flush_user(user)
+            except Exception as e:
+                logger.warning(f"Conversation backup for {user} failed: {e}")
+                with self._lock:
+                    self._dirty.add(user)
+        return written
+
+    def compact(self, user_id: str):
+        """Rewrite the live file sorted and de-duplicated by message id"""
+        with self._flush_lock:
+            self._compact(user_id)
+
+    def close(self):
+        """Stop the flusher and write whatever is pending"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._dirty)
+        return {
+            "pending_users": pending,
+            "flushes": self.flushes,
+            "lines_written": self.lines_written,
+            "compactions": self.compactions,
+            "rotations": self.rotations
+        }
+
+    def backup_path(self, user_id: str) -> Path:
+        return self.user_data_dir / f"{user_id}_conversation_backup.jsonl"
+
+    def _mark_path(self, user_id: str) -> Path:
+        return self.user_data_dir / f"{user_id}_conversation_backup.hwm"
+
+    def _legacy_path(self, user_id: str) -> Path:
+        return self.user_data_dir / f"{user_id}_conversation_backup.json"
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._run, name="conversation-backup", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _flush_user(self, user_id: str) -> int:
+        with self._flush_lock:
+            path = self.backup_path(user_id)
+            # A rotation also leaves no live file; the mark shows the user is past the first flush
+            if (not path.exists() and not self._mark_path(user_id).exists()
+                    and self._legacy_path(user_id).exists()):
+                self._import_legacy(user_id)
+
+            mark = self._read_mark(user_id)
+            written = 0
+            while True:
+                rows = self.memory_manager.get_conversations_after(user_id, mark, limit=self.batch_size)
+                if not rows:
+                    break
+                self._append(path, rows)
+                mark = rows[-1]["id"]
+                self._write_mark(user_id, mark)
+                written += len(rows)
+                if len(rows) < self.batch_size:
+                    break
+
+            self.flushes += 1
+            self.lines_written += written
+            count = self._flush_counts.get(user_id, 0) + 1
+            self._flush_counts[user_id] = count
+            if path.exists() and path.stat().st_size > self.max_file_bytes:
+                self._compact(user_id)
+                if path.stat().st_size > self.max_file_bytes:
+                    self._rotate(user_id)
+            elif written and count % self.compact_every == 0:
+                self._compact(user_id)
+            return written
+
+    def _append(self, path: Path, rows: List[Dict]):
+        """One write per batch; lines are complete JSON documents"""
+        data = "".join(json.dumps(row, default=str) + "\n" for row in rows)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_mark(self, user_id: str) -> int:
+        try:
+            with open(self._mark_path(user_id), "r", encoding="utf-8") as f:
+                return int(json.load(f).get("last_id", 0))
+        except (OSError, ValueError, AttributeError):
+            return self._last_id_in_file(self.backup_path(user_id))
+
+    def _write_mark(self, user_id: str, last_id: int):
+        path = self._mark_path(user_id)
+        tmp = path.with_suffix(".hwm.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"last_id": last_id, "updated_at": time.time()}, f)
+        os.replace(tmp, path)
+
+    def _last_id_in_file(self, path: Path) -> int:
+        """Recover the mark from the backup itself when the mark file is missing"""
+        last_id = 0
+        for row in self._read_lines(path):
+            last_id = max(last_id, int(row.get("id") or 0))
+        return last_id
+
+    def _read_lines(self, path: Path):
+        if not path.exists():
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from a crash mid-append
+
+    def _compact(self, user_id: str):
+        path = self.backup_path(user_id)
+        rows = {}
+        for row in self._read_lines(path):
+            rows[row.get("id")] = row
+        if not rows:
+            return
+        tmp = path.with_suffix(".jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for _, row in sorted(rows.items(), key=lambda item: item[0] or 0):
+                f.write(json.dumps(row, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.compactions += 1
+
+    def _rotate(self, user_id: str):
+        path = self.backup_path(user_id)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        seq = 0
+        while True:
+            rotated = path.with_name(f"{user_id}_conversation_backup.{stamp}-{seq:03d}.jsonl")
+            if not rotated.exists():
+                break
+            seq += 1
+        os.replace(path, rotated)
+        self.rotations += 1
+
+        if self.max_rotated is not None:
+            segments = sorted(self.user_data_dir.glob(f"{user_id}_conversation_backup.*-*.jsonl"))
+            for old in segments[:-self.max_rotated] if self.max_rotated else segments:
+                old.unlink()
+
+    def _import_legacy(self, user_id: str):
+        """Seed the JSONL file and mark from the old whole-file JSON backup, then set it aside"""
+        legacy = self._legacy_path(user_id)
+        try:
+            with open(legacy, "r", encoding="utf-8") as f:
+                rows = [row for row in json.load(f) if isinstance(row, dict) and "id" in row]
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable legacy backup for {user_id}: {e}")
+            return
+        rows.sort(key=lambda row: row["id"])
+        if rows:
+            self._append(self.backup_path(user_id), rows)
+            self._write_mark(user_id, rows[-1]["id"])
+        os.replace(legacy, legacy.with_name(legacy.name + ".imported"))
+
+
+# Global instance
+_conversation_backup: Optional[ConversationBackup] = None
+_conversation_backup_lock = threading.Lock()
+
+
+def get_conversation_backup(memory_manager=None, user_data_dir: str = "userData") -> ConversationBackup:
+    """Get or create the process-wide conversation backup; drained at exit"""
+    global _conversation_backup
+    with _conversation_backup_lock:
+        if _conversation_backup is None:
+            if memory_manager is None:
+                from maang_agent.memory_persistence import get_memory_manager
+                memory_manager = get_memory_manager()
+            _conversation_backup = ConversationBackup(memory_manager, user_data_dir)
+            atexit.register(_conversation_backup.close)
+    return _conversation_backup
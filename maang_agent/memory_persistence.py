@@ -7,21 +7,143 @@ import json
 import sqlite3
 import os
 import re
+import threading
+import queue
+import atexit
+from contextlib import nullcontext
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pathlib import Path
-from collections import Counter
+from collections import Counter, OrderedDict
+
+from maang_agent.write_behind import ConversationWriteBehind
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connection whose close() returns it to its pool instead of closing it"""
+    
+    pool = None
+    leased = False
+    
+    def close(self):
+        if not self.leased:
+            return  # Already returned; a second close() must not hand it out twice
+        self.leased = False
+        if self.in_transaction:
+            self.rollback()
+        self.pool.release(self)
+    
+    def close_for_real(self):
+        self.leased = False
+        super().close()
+
+
+class SQLiteConnectionPool:
+    """
+    Bounded pool of long-lived connections to a database file
+    A call leases an idle connection (or opens one) and close() hands it
+    back; at most max_idle are kept, extras are really closed. Nothing
+    holds a leased connection but its caller, so one dropped without
+    close() is freed by the garbage collector, and short-lived request
+    threads share the same few connections instead of opening their own.
+    Connections are tuned once when opened: WAL so readers never block the
+    writer, synchronous=NORMAL (durable at checkpoints, safe under WAL), a
+    larger page cache and memory-mapped reads, and a bigger prepared
+    statement cache so the same queries are not recompiled every turn
+    """
+    
+    CACHE_SIZE_KB = 16 * 1024
+    MMAP_SIZE = 64 * 1024 * 1024
+    CACHED_STATEMENTS = 256
+    
+    def __init__(self, db_path: str, max_idle: int = 8):
+        self.db_path = db_path
+        self.max_idle = max(1, max_idle)
+        self.opened = 0
+        self._idle: "queue.LifoQueue[PooledConnection]" = queue.LifoQueue(maxsize=self.max_idle)
+    
+    def connection(self) -> PooledConnection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        conn.leased = True
+        return conn
+    
+    def release(self, conn: PooledConnection):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close_for_real()
+    
+    def close_all(self):
+        """Close every idle connection, e.g. at shutdown"""
+        while True:
+            try:
+                self._idle.get_nowait().close_for_real()
+            except queue.Empty:
+                return
+    
+    def _open(self) -> PooledConnection:
+        # Leases move between threads; only one holds a connection at a time
+        conn = sqlite3.connect(self.db_path, timeout=30, factory=PooledConnection,
+                               cached_statements=self.CACHED_STATEMENTS, check_same_thread=False)
+        conn.pool = self
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{self.CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        self.opened += 1
+        return conn
+
+
+_pools: Dict[str, SQLiteConnectionPool] = {}
+# Schema setup runs once per database file per process; value is fts_enabled
+_initialized_paths: Dict[str, bool] = {}
+_pools_lock = threading.Lock()
+_schema_lock = threading.Lock()
+
+
+def get_connection_pool(db_path: str) -> SQLiteConnectionPool:
+    """Get or create the process-wide connection pool for a database file"""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SQLiteConnectionPool(db_path)
+        return _pools[key]
+
 
 class AgentMemoryManager:
     """Manages persistent memory for the MAANG Mentor AI agent"""
     
-    def __init__(self, db_path: str = "maang_agent_memory.db"):
+    SESSION_TYPE_CACHE_SIZE = 10000
+    
+    def __init__(self, db_path: str = "maang_agent_memory.db", pooled: bool = True,
+                 write_behind: bool = False, write_batch: int = 64, write_delay_ms: float = 50.0):
         self.db_path = db_path
-        self._init_tables()
+        # pooled=False opens a fresh connection per call, the original behaviour
+        self.pool = get_connection_pool(db_path) if pooled else None
+        # session_id -> session_type, so queued messages resolve it without the DB;
+        # least recently used sessions are dropped past SESSION_TYPE_CACHE_SIZE
+        self._session_types: "OrderedDict[str, str]" = OrderedDict()
+        self._session_types_lock = threading.Lock()
+        with _schema_lock:
+            self._init_tables()
+        # write_behind=True queues store_conversation rows for batched background commits
+        self.writer = ConversationWriteBehind(
+            self._insert_conversations, max_batch=write_batch, max_delay_ms=write_delay_ms
+        ) if write_behind else None
     
     def _init_tables(self):
         """Initialize memory database tables"""
-        conn = sqlite3.connect(self.db_path)
+        key = os.path.abspath(self.db_path)
+        if self.pool and key in _initialized_paths:
+            self.fts_enabled = _initialized_paths[key]
+            return
+        
+        conn = self._get_connection()
         cursor = conn.cursor()
         
         # Conversation history table
@@ -38,6 +160,9 @@ class AgentMemoryManager:
         """)
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_session ON conversation_history(user_id, session_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON conversation_history(timestamp)")
+        self._init_session_type(cursor)
+        self.fts_enabled = self._init_conversation_fts(cursor)
+        self._init_conversation_tags(cursor)
         
         # Topic coverage tracking
         cursor.execute("""
@@ -193,9 +318,117 @@ class AgentMemoryManager:
         
         conn.commit()
         conn.close()
+        if self.pool:
+            _initialized_paths[key] = self.fts_enabled
+    
+    def _init_session_type(self, cursor: sqlite3.Cursor):
+        """Promote metadata.session_type to an indexed column, backfilling older rows"""
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(conversation_history)")}
+        if 'session_type' not in columns:
+            cursor.execute("ALTER TABLE conversation_history ADD COLUMN session_type TEXT")
+            cursor.execute("""
+                UPDATE conversation_history
+                SET session_type = json_extract(metadata, '$.session_type')
+                WHERE json_valid(metadata)
+            """)
+            # Messages inherit the type recorded when their session started
+            cursor.execute("""
+                UPDATE conversation_history
+                SET session_type = (
+                    SELECT s.session_type FROM conversation_history s
+                    WHERE s.session_id = conversation_history.session_id
+                      AND s.session_type IS NOT NULL
+                    LIMIT 1
+                )
+                WHERE session_type IS NULL
+            """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_session_type ON conversation_history(user_id, session_type)")
+    
+    def _init_conversation_fts(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        FTS5 index over conversation_history.message, kept in sync by triggers
+        Returns False when this SQLite build lacks FTS5
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversation_fts'"
+        ).fetchone()
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS conversation_fts USING fts5(
+                    message,
+                    content='conversation_history',
+                    content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return False
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversation_fts_insert AFTER INSERT ON conversation_history BEGIN
+                INSERT INTO conversation_fts(rowid, message) VALUES (new.id, new.message);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversation_fts_delete AFTER DELETE ON conversation_history BEGIN
+                INSERT INTO conversation_fts(conversation_fts, rowid, message) VALUES ('delete', old.id, old.message);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversation_fts_update AFTER UPDATE OF message ON conversation_history BEGIN
+                INSERT INTO conversation_fts(conversation_fts, rowid, message) VALUES ('delete', old.id, old.message);
+                INSERT INTO conversation_fts(rowid, message) VALUES (new.id, new.message);
+            END
+        """)
+        if not exists:
+            # Index the history written before the FTS table existed
+            cursor.execute("INSERT INTO conversation_fts(conversation_fts) VALUES ('rebuild')")
+        return True
+    
+    def _init_conversation_tags(self, cursor: sqlite3.Cursor):
+        """
+        Side table of each message's normalized metadata values (category, topic, ...)
+        Filled by triggers at write time so category lookups are index seeks
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversation_tags'"
+        ).fetchone()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS conversation_tags (
+                conversation_id INTEGER NOT NULL,
+                user_id TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (user_id, tag, conversation_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversation_tags_id ON conversation_tags(conversation_id)")
+        
+        tag_values = """
+            SELECT {row}.id, {row}.user_id, lower(trim(j.value))
+            FROM {source}json_each(CASE WHEN json_valid({row}.metadata) THEN {row}.metadata ELSE '{{}}' END) j
+            WHERE j.type = 'text' AND length(trim(j.value)) BETWEEN 1 AND 64
+        """
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS conversation_tags_insert AFTER INSERT ON conversation_history BEGIN
+                INSERT OR IGNORE INTO conversation_tags (conversation_id, user_id, tag)
+                {tag_values.format(row='new', source='')};
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversation_tags_delete AFTER DELETE ON conversation_history BEGIN
+                DELETE FROM conversation_tags WHERE conversation_id = old.id;
+            END
+        """)
+        if not exists:
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO conversation_tags (conversation_id, user_id, tag)
+                {tag_values.format(row='h', source='conversation_history h, ')}
+            """)
     
     def _get_connection(self) -> sqlite3.Connection:
-        """Get database connection with row factory"""
+        """Get database connection with row factory; pooled ones go back to the pool on close()"""
+        if self.pool:
+            return self.pool.connection()
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
@@ -209,20 +442,88 @@ class AgentMemoryManager:
         role: str, 
         message: str, 
         metadata: Optional[Dict] = None
-    ) -> int:
-        """Store a message in conversation history"""
+    ) -> Optional[int]:
+        """
+        Store a message in conversation history
+        
+        Returns the row id, or None when write-behind queues the row; it is
+        committed within write_delay_ms and get_conversation_history sees it
+        immediately.
+        """
+        row = {
+            'user_id': user_id,
+            'session_id': session_id,
+            'role': role,
+            'message': message,
+            # Same format as CURRENT_TIMESTAMP, stamped now rather than at commit
+            'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+            'metadata': json.dumps(metadata or {}),
+            'session_type': self._session_type(session_id, metadata)
+        }
+        if self.writer:
+            self.writer.submit(row)
+            return None
+        return self._insert_conversations([row])[0]
+    
+    def _insert_conversations(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """Insert conversation rows in one transaction; returns their ids"""
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            INSERT INTO conversation_history (user_id, session_id, role, message, metadata)
-            VALUES (?, ?, ?, ?, ?)
-        """, (user_id, session_id, role, message, json.dumps(metadata or {})))
+        ids = []
+        try:
+            for row in rows:
+                cursor.execute("""
+                    INSERT INTO conversation_history
+                        (user_id, session_id, role, message, timestamp, metadata, session_type)
+                    VALUES (:user_id, :session_id, :role, :message, :timestamp, :metadata, :session_type)
+                """, row)
+                ids.append(cursor.lastrowid)
+            conn.commit()
+        finally:
+            conn.close()
+        return ids
+    
+    def flush_writes(self) -> int:
+        """Commit any queued conversation rows now; returns how many"""
+        return self.writer.flush() if self.writer else 0
+    
+    def close(self):
+        """Drain the write-behind queue"""
+        if self.writer:
+            self.writer.close()
+    
+    def _session_type(self, session_id: str, metadata: Optional[Dict]) -> Optional[str]:
+        """The message's session type: its own metadata, else the one its session started with"""
+        session_type = (metadata or {}).get('session_type')
+        if not session_id:
+            return session_type
+        if session_type:
+            self._remember_session_type(session_id, session_type)
+            return session_type
+        with self._session_types_lock:
+            if session_id in self._session_types:
+                self._session_types.move_to_end(session_id)
+                return self._session_types[session_id]
         
-        conn.commit()
-        msg_id = cursor.lastrowid
+        conn = self._get_connection()
+        row = conn.execute("""
+            SELECT session_type FROM conversation_history
+            WHERE session_id = ? AND session_type IS NOT NULL
+            LIMIT 1
+        """, (session_id,)).fetchone()
         conn.close()
-        return msg_id
+        if row:
+            self._remember_session_type(session_id, row[0])
+        return row[0] if row else None
+    
+    def _remember_session_type(self, session_id: str, session_type: str):
+        """Cache the type a session started with, keeping the first one seen"""
+        with self._session_types_lock:
+            self._session_types.setdefault(session_id, session_type)
+            self._session_types.move_to_end(session_id)
+            if len(self._session_types) > self.SESSION_TYPE_CACHE_SIZE:
+                self._session_types.popitem(last=False)
     
     def get_conversation_history(
         self, 
@@ -230,24 +531,49 @@ class AgentMemoryManager:
         session_id: Optional[str] = None, 
         limit: int = 50
     ) -> List[Dict]:
-        """Retrieve conversation history"""
+        """Retrieve conversation history, including messages still queued for write-behind"""
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        if session_id:
-            cursor.execute("""
-                SELECT * FROM conversation_history 
-                WHERE user_id = ? AND session_id = ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (user_id, session_id, limit))
-        else:
-            cursor.execute("""
-                SELECT * FROM conversation_history 
-                WHERE user_id = ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (user_id, limit))
+        # Commits wait while we read, so a row is either in the result or still pending
+        with self.writer.consistent_read() if self.writer else nullcontext():
+            if session_id:
+                cursor.execute("""
+                    SELECT * FROM conversation_history 
+                    WHERE user_id = ? AND session_id = ?
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT ?
+                """, (user_id, session_id, limit))
+            else:
+                cursor.execute("""
+                    SELECT * FROM conversation_history 
+                    WHERE user_id = ?
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT ?
+                """, (user_id, limit))
+            
+            rows = [dict(row) for row in cursor.fetchall()]
+            pending = self.writer.pending(user_id, session_id) if self.writer else []
+        conn.close()
+        
+        if pending:
+            # Queued rows have no id yet; newest first, ahead of committed rows of the same second
+            for row in pending:
+                row['id'] = None
+            rows = sorted(pending[::-1] + rows, key=lambda row: row['timestamp'] or '', reverse=True)[:limit]
+        return rows
+    
+    def get_conversations_after(self, user_id: str, after_id: int = 0, limit: int = 1000) -> List[Dict]:
+        """User's committed messages with id greater than after_id, oldest first"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT * FROM conversation_history
+            WHERE id > ? AND user_id = ?
+            ORDER BY id
+            LIMIT ?
+        """, (after_id, user_id, limit))
         
         rows = cursor.fetchall()
         conn.close()
@@ -636,9 +962,58 @@ class AgentMemoryManager:
         limit: int = 5
     ) -> List[Dict]:
         """
-        Retrieve relevant conversation context using semantic search
-        Uses TF-IDF-like approach for simple semantic matching
+        Retrieve relevant conversation context
+        Ranks the user's whole history by BM25 through the FTS5 index; falls
+        back to word overlap over recent messages when FTS5 is unavailable
         """
+        if not self.fts_enabled:
+            return self._scan_rag_context(user_id, query, session_type, limit)
+        
+        terms = self._tokenize(query or '')[:32]
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            # Session-type matches first; like the scan, fall back to all of the user's history
+            for type_filter in ([session_type, None] if session_type else [None]):
+                where = "h.user_id = ?"
+                params: List[Any] = [user_id]
+                if type_filter:
+                    where += " AND h.session_type = ?"
+                    params.append(type_filter)
+                
+                if terms:
+                    cursor.execute(f"""
+                        SELECT h.id, h.message, h.role, h.metadata, h.timestamp
+                        FROM conversation_fts
+                        JOIN conversation_history h ON h.id = conversation_fts.rowid
+                        WHERE conversation_fts MATCH ? AND {where}
+                        ORDER BY bm25(conversation_fts), h.id DESC
+                        LIMIT ?
+                    """, [" OR ".join(f'"{term}"' for term in terms)] + params + [limit])
+                else:
+                    cursor.execute(f"""
+                        SELECT h.id, h.message, h.role, h.metadata, h.timestamp
+                        FROM conversation_history h
+                        WHERE {where}
+                        ORDER BY h.timestamp DESC, h.id DESC
+                        LIMIT ?
+                    """, params + [limit])
+                
+                rows = [dict(row) for row in cursor.fetchall()]
+                if rows:
+                    return rows
+            return []
+        finally:
+            conn.close()
+    
+    def _scan_rag_context(
+        self,
+        user_id: str,
+        query: Optional[str] = None,
+        session_type: Optional[str] = None,
+        limit: int = 5
+    ) -> List[Dict]:
+        """Jaccard word overlap over the latest 100 messages"""
         conn = self._get_connection()
         cursor = conn.cursor()
         
@@ -707,21 +1082,30 @@ class AgentMemoryManager:
         category: str,
         limit: int = 3
     ) -> List[Dict]:
-        """Get conversations related to a specific topic/category"""
+        """
+        Get conversations related to a specific topic/category
+        Messages mentioning the topic come from the FTS index, messages tagged
+        with the category from conversation_tags; both are index lookups
+        """
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        # Search for conversations mentioning the topic
-        cursor.execute("""
+        matches = ["SELECT conversation_id FROM conversation_tags WHERE user_id = ? AND tag = ?"]
+        params: List[Any] = [user_id, (category or '').strip().lower()]
+        if topic and self.fts_enabled:
+            matches.append("SELECT rowid FROM conversation_fts WHERE conversation_fts MATCH ?")
+            params.append('"' + topic.replace('"', '""') + '"')
+        elif topic:
+            matches.append("SELECT id FROM conversation_history WHERE user_id = ? AND message LIKE ?")
+            params.extend([user_id, f'%{topic}%'])
+        
+        cursor.execute(f"""
             SELECT id, message, role, metadata, timestamp
             FROM conversation_history
-            WHERE user_id = ? AND (
-                message LIKE ? OR
-                metadata LIKE ?
-            )
-            ORDER BY timestamp DESC
+            WHERE user_id = ? AND id IN ({" UNION ".join(matches)})
+            ORDER BY timestamp DESC, id DESC
             LIMIT ?
-        """, (user_id, f'%{topic}%', f'%{category}%', limit))
+        """, [user_id] + params + [limit])
         
         rows = cursor.fetchall()
         conn.close()
@@ -1034,5 +1418,8 @@ def get_memory_manager() -> AgentMemoryManager:
     """Get or create the global memory manager instance"""
     global _memory_manager
     if _memory_manager is None:
-        _memory_manager = AgentMemoryManager()
+        _memory_manager = AgentMemoryManager(
+            write_behind=os.getenv('AGENT_MEMORY_WRITE_BEHIND', 'True') == 'True'
+        )
+        atexit.register(_memory_manager.close)
     return _memory_manager
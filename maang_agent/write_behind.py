@@ -0,0 +1,202 @@
+"""
+Write-behind queue for conversation messages
+
+store_conversation hands its row to this queue and returns at once. A
+background thread inserts queued rows in one transaction as soon as
+max_batch rows are waiting or max_delay_ms after the oldest one arrived,
+so a chat turn's several inserts cost one commit off the request path.
+
+Rows stay visible while queued: readers hold consistent_read() around
+their SELECT and their pending() snapshot, and a batch is only removed
+from the queue under the same lock once its transaction has committed,
+so every row is seen exactly once - in the database or in the queue.
+A batch whose transaction fails (e.g. "database is locked") stays queued
+and is retried with exponential backoff; a row is only dropped, with an
+error logged and its future failed, after max_attempts failed commits.
+close() drains the queue; the global manager registers it at exit.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationWriteBehind:
+    """Batches conversation inserts into background transactions"""
+
+    def __init__(self, write_batch: Callable[[List[Dict[str, Any]]], List[int]],
+                 max_batch: int = 64, max_delay_ms: float = 50.0,
+                 max_attempts: int = 5, retry_delay_ms: float = 100.0, max_retry_delay_ms: float = 5000.0):
+        self.write_batch = write_batch
+        self.max_batch = max(1, max_batch)
+        self.max_delay_ms = max_delay_ms
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay_ms = retry_delay_ms
+        self.max_retry_delay_ms = max_retry_delay_ms
+        self.batches = 0
+        self.rows_written = 0
+        self.retries = 0
+        self.failed_rows = 0
+        # (row, future, queued_at, failed_attempts)
+        self._queue: List[Tuple[Dict[str, Any], Future, float, int]] = []
+        # No commit is attempted before this monotonic time while backing off
+        self._retry_at = 0.0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.RLock()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, row: Dict[str, Any]) -> Future:
+        """Queue a row; the future resolves to its id once committed"""
+        future: Future = Future()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Conversation write-behind queue is closed")
+            self._queue.append((row, future, time.monotonic(), 0))
+            self._cond.notify()
+        self._ensure_started()
+        return future
+
+    @contextmanager
+    def consistent_read(self):
+        """Hold off commits so a SELECT and pending() see each row exactly once"""
+        with self._flush_lock:
+            yield
+
+    def pending(self, user_id: str, session_id: str = None) -> List[Dict[str, Any]]:
+        """Queued rows for a user (and session), oldest first"""
+        with self._cond:
+            return [
+                dict(row) for row, _, _, _ in self._queue
+                if row["user_id"] == user_id and (session_id is None or row["session_id"] == session_id)
+            ]
+
+    def flush(self) -> int:
+        """
+        Write everything queued now, on the calling thread; returns rows written.
+        Stops at the first failed batch, which stays queued for a retry.
+        """
+        written = 0
+        while True:
+            count = self._flush_batch()
+            if count <= 0:
+                return written
+            written += count
+    
+    def close(self):
+        """Stop the background thread and drain the queue, retrying failed batches"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        while True:
+            self.flush()
+            with self._cond:
+                if not self._queue:
+                    return
+                wait = self._retry_at - time.monotonic()
+            # Every failure counts towards max_attempts, so this ends
+            if wait > 0:
+                time.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "retries": self.retries,
+            "failed_rows": self.failed_rows,
+            "avg_batch_size": (self.rows_written / self.batches) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "max_delay_ms": self.max_delay_ms
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name="conversation-write-behind",
+                                                daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                # Give the batch until the oldest row's deadline to fill up
+                deadline = self._queue[0][2] + self.max_delay_ms / 1000
+                while len(self._queue) < self.max_batch and not self._stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                # Back off after a failed commit
+                while not self._stopped:
+                    remaining = self._retry_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopped:
+                    return
+            self._flush_batch()
+    
+    def _flush_batch(self) -> int:
+        """Commit the oldest batch; returns its size, 0 if empty, -1 if it failed"""
+        with self._flush_lock:
+            with self._cond:
+                batch = self._queue[:self.max_batch]
+            if not batch:
+                return 0
+            
+            try:
+                ids = self.write_batch([row for row, _, _, _ in batch])
+            except Exception as e:
+                self._batch_failed(batch, e)
+                return -1
+            
+            with self._cond:
+                del self._queue[:len(batch)]
+                self._retry_at = 0.0
+        
+        for (_, future, _, _), row_id in zip(batch, ids):
+            future.set_result(row_id)
+        self.batches += 1
+        self.rows_written += len(batch)
+        return len(batch)
+    
+    def _batch_failed(self, batch: List[Tuple[Dict[str, Any], Future, float, int]], error: Exception):
+        """Keep a failed batch queued for retry, dropping rows that used up max_attempts"""
+        retry, dropped = [], []
+        for row, future, queued_at, attempts in batch:
+            entry = (row, future, queued_at, attempts + 1)
+            (dropped if attempts + 1 >= self.max_attempts else retry).append(entry)
+        
+        attempts = max(entry[3] for entry in batch) + 1
+        delay_ms = min(self.retry_delay_ms * 2 ** (attempts - 1), self.max_retry_delay_ms)
+        with self._cond:
+            # Only this thread removes rows (under _flush_lock), so the batch is still the head
+            self._queue[:len(batch)] = retry
+            self._retry_at = time.monotonic() + delay_ms / 1000
+        
+        if dropped:
+            logger.error(f"Dropping {len(dropped)} conversation rows after {self.max_attempts} "
+                         f"failed write-behind attempts: {error}")
+            self.failed_rows += len(dropped)
+            for _, future, _, _ in dropped:
+                future.set_exception(error)
+        if retry:
+            self.retries += 1
+            logger.warning(f"Write-behind batch of {len(batch)} conversation rows failed, "
+                           f"retrying in {delay_ms:.0f} ms: {error}")
@@ -0,0 +1,283 @@
+"""
+Approximate nearest-neighbour search for large memory sets
+
+IVFFlatIndex is a pure-NumPy inverted-file index: spherical k-means splits
+the normalized vectors into n_lists clusters stored contiguously, and a
+query is scored only against the n_probe clusters whose centroids are
+closest to it. n_probe trades recall for latency (n_probe = n_lists is
+exact). Vectors added after training are assigned their nearest list and
+appended to a tail; a query scores the tail rows of its probed lists, as
+if they were in those blocks. The tail can grow to (retrain_growth - 1)
+times the trained size before the index retrains, so it is not scanned
+in full.
+
+AnnMemoryIndex keeps one IVFFlatIndex per user over MmapVectorStore rows
+and is the 'ivf' backend behind RAGMemoryEngine._search_memories.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from memory.rag_engine import EmbeddingService
+
+
+class IVFFlatIndex:
+    """Inverted-file index with exact (flat) scoring inside probed lists"""
+
+    def __init__(self, dimension: int, n_lists: int = None, n_probe: int = 16,
+                 min_train_size: int = 2048, retrain_growth: float = 2.0,
+                 kmeans_iterations: int = 10, seed: int = 0):
+        self.dimension = dimension
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+
+        self.size = 0
+        self._matrix = np.zeros((256, dimension), dtype=np.float32)
+        self._ids = np.zeros(256, dtype=np.int64)
+        self._assign = np.zeros(256, dtype=np.int32)
+        self._centroids: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._built_size = 0
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray):
+        """Insert vectors (any scale) under the caller's integer ids"""
+        vectors = EmbeddingService.normalize(np.atleast_2d(vectors))
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        count = len(vectors)
+        if self.size + count > len(self._matrix):
+            self._grow(max(2 * len(self._matrix), self.size + count))
+
+        end = self.size + count
+        self._matrix[self.size:end] = vectors
+        self._ids[self.size:end] = ids
+        if self.trained:
+            self._assign[self.size:end] = self._nearest_lists(vectors)
+        self.size = end
+
+        if not self.trained and self.size >= self.min_train_size:
+            self.rebuild()
+        elif self.trained and self.size >= self.retrain_growth * self._built_size:
+            self.rebuild()
+
+    def rebuild(self):
+        """Retrain the centroids on every vector and regroup rows by list"""
+        if self.size == 0:
+            return
+
+        data = self._matrix[:self.size]
+        n_lists = self.n_lists or int(min(4096, max(16, math.sqrt(self.size))))
+        n_lists = min(n_lists, self.size)
+        centroids = self._kmeans(data, n_lists)
+        assign = self._nearest_lists(data, centroids)
+
+        # Rows of each list become one contiguous block, scored without a gather
+        order = np.argsort(assign, kind="stable")
+        self._matrix[:self.size] = data[order]
+        self._ids[:self.size] = self._ids[:self.size][order]
+        self._assign[:self.size] = assign[order]
+        self._offsets = np.searchsorted(self._assign[:self.size], np.arange(n_lists + 1))
+        self._centroids = centroids
+        self._built_size = self.size
+
+    def search(self, query: np.ndarray, top_k: int, n_probe: int = None,
+               id_filter: Callable[[np.ndarray], np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Approximate top-k (id, similarity) pairs, most similar first
+
+        id_filter receives candidate ids and returns a boolean mask of the
+        ones allowed, so metadata filters apply before ranking.
+        """
+        if self.size == 0 or top_k <= 0:
+            return []
+
+        query = EmbeddingService.normalize(query)
+        if not self.trained:
+            candidates = np.arange(self.size)
+            scores = self._matrix[:self.size] @ query
+        else:
+            n_probe = min(n_probe or self.n_probe, len(self._centroids))
+            probe = np.argpartition(-(self._centroids @ query), n_probe - 1)[:n_probe]
+
+            blocks = [np.arange(self._offsets[c], self._offsets[c + 1]) for c in probe]
+            block_scores = [self._matrix[self._offsets[c]:self._offsets[c + 1]] @ query for c in probe]
+            tail = self._built_size + np.flatnonzero(np.isin(self._assign[self._built_size:self.size], probe))
+            blocks.append(tail)
+            block_scores.append(self._matrix[tail] @ query)
+
+            candidates = np.concatenate(blocks)
+            scores = np.concatenate(block_scores)
+
+        ids = self._ids[candidates]
+        if id_filter is not None:
+            allowed = id_filter(ids)
+            ids, scores = ids[allowed], scores[allowed]
+        if len(scores) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            ids, scores = ids[top], scores[top]
+
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "trained": self.trained,
+            "n_lists": len(self._centroids) if self.trained else 0,
+            "n_probe": self.n_probe,
+            "tail": self.size - self._built_size if self.trained else self.size,
+            "bytes": self._matrix.nbytes + self._ids.nbytes + self._assign.nbytes
+        }
+
+    def _nearest_lists(self, vectors: np.ndarray, centroids: np.ndarray = None,
+                       chunk_rows: int = 8192) -> np.ndarray:
+        centroids = self._centroids if centroids is None else centroids
+        assign = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_rows):
+            chunk = vectors[start:start + chunk_rows]
+            assign[start:start + chunk_rows] = np.argmax(chunk @ centroids.T, axis=1)
+        return assign
+
+    def _kmeans(self, data: np.ndarray, n_lists: int) -> np.ndarray:
+        """Spherical k-means on a sample of at most 256 points per list"""
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(data), 256 * n_lists)
+        sample = data[rng.choice(len(data), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            assign = self._nearest_lists(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=n_lists) == 0
+            # Empty lists restart from random points instead of collapsing
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = EmbeddingService.normalize(sums)
+        return centroids
+
+    def _grow(self, capacity: int):
+        matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+        matrix[:self.size] = self._matrix[:self.size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self.size] = self._ids[:self.size]
+        assign = np.zeros(capacity, dtype=np.int32)
+        assign[:self.size] = self._assign[:self.size]
+        self._matrix, self._ids, self._assign = matrix, ids, assign
+
+
+class _UserAnn:
+    """One user's IVF index plus the store rows and filter codes behind its ids"""
+
+    def __init__(self, index: IVFFlatIndex):
+        self.index = index
+        self.rows: List[int] = []
+        self.topics: List[Optional[str]] = []
+        self.contexts: List[Optional[str]] = []
+        self.built_at = time.time()
+        self.lock = threading.Lock()
+
+    def add(self, row: int, vector: np.ndarray, topic: str = None, context: str = None):
+        self.index.add([len(self.rows)], vector)
+        self.rows.append(row)
+        self.topics.append(topic)
+        self.contexts.append(context)
+
+
+class AnnMemoryIndex:
+    """Per-user IVF indexes over MmapVectorStore rows"""
+
+    def __init__(self, vector_store, n_probe: int = 16, min_train_size: int = 2048,
+                 rebuild_seconds: float = 3600, max_users: int = 64):
+        self.vector_store = vector_store
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.rebuild_seconds = rebuild_seconds
+        self.max_users = max_users
+        self._users: "OrderedDict[str, _UserAnn]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, user_id: str, row: int, vector: np.ndarray, topic: str = None, context: str = None):
+        """Index a newly stored row if the user's index is loaded"""
+        with self._lock:
+            entry = self._users.get(user_id)
+        if entry is not None:
+            with entry.lock:
+                entry.add(row, vector, topic, context)
+
+    def search(
+        self,
+        user_id: str,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        similarity_threshold: float = None,
+        topic: str = None,
+        context: str = None
+    ) -> List[Dict[str, Any]]:
+        """Approximate top-k of the user's memories, same shape as MmapVectorStore.search"""
+        entry = self._entry(user_id)
+        with entry.lock:
+            id_filter = None
+            if topic or context:
+                topics = np.asarray(entry.topics, dtype=object)
+                contexts = np.asarray(entry.contexts, dtype=object)
+
+                def id_filter(ids: np.ndarray) -> np.ndarray:
+                    allowed = np.ones(len(ids), dtype=bool)
+                    if topic:
+                        allowed &= topics[ids] == topic
+                    if context:
+                        allowed &= contexts[ids] == context
+                    return allowed
+
+            ranked = entry.index.search(query_embedding, top_k, id_filter=id_filter)
+            rows = [(entry.rows[i], score) for i, score in ranked
+                    if similarity_threshold is None or score >= similarity_threshold]
+
+        # Tombstoned rows drop out here until the next rebuild removes them
+        records = self.vector_store.records([row for row, _ in rows])
+        return [dict(records[row], similarity=score) for row, score in rows if row in records]
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {user_id: entry.index.stats() for user_id, entry in self._users.items()}
+
+    def _entry(self, user_id: str) -> _UserAnn:
+        """The user's index, (re)built from the store when missing or stale"""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and time.time() - entry.built_at < self.rebuild_seconds:
+                self._users.move_to_end(user_id)
+                return entry
+
+        entry = self._load(user_id)
+        with self._lock:
+            self._users[user_id] = entry
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return entry
+
+    def _load(self, user_id: str) -> _UserAnn:
+        entry = _UserAnn(IVFFlatIndex(self.vector_store.dimension, n_probe=self.n_probe,
+                                      min_train_size=self.min_train_size))
+        rows, topics, contexts = self.vector_store.user_rows(user_id)
+        if rows:
+            entry.rows, entry.topics, entry.contexts = list(rows), list(topics), list(contexts)
+            entry.index.add(np.arange(len(rows)), self.vector_store.vectors(rows))
+        return entry
@@ -0,0 +1,94 @@
+"""
+Micro-batching queue for embedding requests
+
+Request threads that miss the embedding cache each hand their text to one
+background thread and wait on a future. That thread flushes the queue as a
+single batched encode as soon as it holds max_batch_size texts, or
+max_wait_ms after the first text of the batch arrived. While a batch is
+encoding, new requests pile up and go out together in the next one.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text embeds into batched encodes"""
+
+    def __init__(self, encode_batch: Callable[[List[str]], List[np.ndarray]],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encode_batch = encode_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text; the future resolves to its embedding"""
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str, timeout: float = None) -> np.ndarray:
+        return self.submit(text).result(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "pending": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch: List[tuple]):
+        texts = [text for text, _ in batch]
+        try:
+            vectors = self.encode_batch(texts)
+        except Exception as e:
+            logger.error(f"Batched embedding of {len(texts)} texts failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
@@ -0,0 +1,206 @@
+"""
+Two-tier embedding cache keyed by (model name, sha1 of text)
+
+Tier 1 is an in-process LRU of the exact vectors EmbeddingService returned.
+Tier 2 is shared and persistent - Redis through CacheManager, or a local
+SQLite file - and holds float16-packed vectors, half the size of float32
+with far less error than the cosine scores care about. A tier-2 hit is
+promoted into tier 1. If the persistent tier fails it is switched off and
+the cache keeps working in-process only.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _pack(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=np.float16).tobytes()
+
+
+def _unpack(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.float16).astype(np.float32)
+
+
+class RedisVectorTier:
+    """Persistent tier in Redis via CacheManager's client"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        from cache.redis_manager import CacheManager
+        return CacheManager.get_client().mget(keys)
+
+    def put_many(self, items: Dict[str, bytes]):
+        from cache.redis_manager import CacheManager
+        pipeline = CacheManager.get_client().pipeline(transaction=False)
+        for key, data in items.items():
+            pipeline.setex(key, self.ttl, data)
+        pipeline.execute()
+
+
+class SQLiteVectorTier:
+    """Persistent tier in a local SQLite file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        placeholders = ",".join("?" * len(keys))
+        found = dict(self._conn().execute(
+            f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+        ).fetchall())
+        return [found.get(key) for key in keys]
+
+    def put_many(self, items: Dict[str, bytes]):
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                             list(items.items()))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+class EmbeddingCache:
+    """In-process LRU in front of an optional persistent float16 tier"""
+
+    def __init__(self, model_name: str, max_entries: int = 10000, persistent=None):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        return f"emb:{self.model_name}:{digest}"
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Cached vectors in input order, None for misses"""
+        keys = [self.key(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    results[i] = vector.copy()
+                    self.memory_hits += 1
+
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        if missing and self.persistent is not None:
+            stored = self._persistent_call("get_many", [keys[i] for i in missing]) or [None] * len(missing)
+            with self._lock:
+                for i, data in zip(missing, stored):
+                    if data:
+                        vector = _unpack(data)
+                        self._remember(keys[i], vector)
+                        results[i] = vector.copy()
+                        self.persistent_hits += 1
+
+        with self._lock:
+            self.misses += sum(1 for vector in results if vector is None)
+        return results
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        return self.get_many([text])[0]
+
+    def put_many(self, texts: List[str], vectors: List[np.ndarray]):
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, np.array(vector, dtype=np.float32))
+        if self.persistent is not None:
+            self._persistent_call("put_many", {key: _pack(vector) for key, vector in zip(keys, vectors)})
+
+    def put(self, text: str, vector: np.ndarray):
+        self.put_many([text], [vector])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.persistent_hits + self.misses
+            return {
+                "model": self.model_name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "persistent_tier": type(self.persistent).__name__ if self.persistent else None,
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.memory_hits + self.persistent_hits) / lookups) if lookups else 0.0
+            }
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the LRU; caller holds the lock"""
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _persistent_call(self, method: str, argument):
+        try:
+            return getattr(self.persistent, method)(argument)
+        except Exception as e:
+            logger.warning(f"Embedding cache {type(self.persistent).__name__} disabled: {e}")
+            self.persistent = None
+            return None
+
+
+# Global instance
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create the embedding cache for the configured model"""
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            from config.settings import config
+
+            persistent = None
+            backend = config.EMBEDDING_CACHE_BACKEND
+            try:
+                if backend == 'redis':
+                    persistent = RedisVectorTier(ttl=config.EMBEDDING_CACHE_TTL)
+                elif backend == 'sqlite':
+                    persistent = SQLiteVectorTier(config.EMBEDDING_CACHE_PATH)
+            except Exception as e:
+                logger.warning(f"Embedding cache persistent tier unavailable: {e}")
+
+            _embedding_cache = EmbeddingCache(
+                model_name=config.EMBEDDING_MODEL,
+                max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES,
+                persistent=persistent
+            )
+    return _embedding_cache
@@ -0,0 +1,281 @@
+"""
+In-memory embedding index for conversation memories
+
+Each active user's memory vectors live in one contiguous, L2-normalized
+matrix with parallel id/topic/context arrays, so a search is a single
+matrix-vector product instead of re-reading and re-parsing every
+ConversationMemory row. The matrix is float32, float16 or per-row-scaled
+int8 (see memory.quantization); the narrower formats fit 2-4x more users
+in the same budget. New memories are appended as they are stored. Users
+are evicted least-recently-used first once the index exceeds its memory
+budget; an evicted user is simply reloaded from the database on next search.
+
+Other worker processes write to the same database, so each loaded index
+keeps the fingerprint (memory count, newest created_at) it was built from.
+Once refresh_seconds have passed since the last check, the caller compares
+it with the database before serving the index and reloads on a mismatch.
+This process's own appends advance the fingerprint and never force a reload.
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from memory import quantization
+from memory.rag_engine import EmbeddingService
+
+
+class UserEmbeddingIndex:
+    """Normalized embedding matrix plus parallel id/topic/context arrays for one user"""
+
+    # Rough per-row cost of the id and label bookkeeping next to the vector
+    ROW_OVERHEAD_BYTES = 96
+
+    def __init__(self, dimension: int, capacity: int = 64, storage: str = "float32"):
+        self.dimension = dimension
+        self.storage = quantization.check_format(storage)
+        self.size = 0
+        self._matrix = np.zeros((capacity, dimension), dtype=quantization.dtype_for(storage))
+        self._scales = np.ones(capacity, dtype=np.float32)
+        self._topic_codes = np.zeros(capacity, dtype=np.int32)
+        self._context_codes = np.zeros(capacity, dtype=np.int32)
+        self._ids: List[str] = []
+        self._codes: Dict[str, Dict[Optional[str], int]] = {"topic": {}, "context": {}}
+        self._lock = threading.Lock()
+
+    def append(self, memory_id: str, embedding: np.ndarray, topic: str = None, context: str = None) -> bool:
+        """Add one memory; returns False if the embedding has the wrong dimension"""
+        if embedding.shape != (self.dimension,):
+            return False
+
+        codes, scales = quantization.quantize_rows(EmbeddingService.normalize(embedding), self.storage)
+        self._insert(memory_id, codes[0], scales[0], topic, context)
+        return True
+
+    def append_encoded(self, memory_id: str, data: bytes, topic: str = None, context: str = None) -> bool:
+        """Add one memory from its stored blob; returns False if the blob is unreadable"""
+        decoded = quantization.decode(data, self.dimension)
+        if decoded is None:
+            return False
+
+        codes, scale, fmt = decoded
+        if fmt != self.storage or fmt == "float32":
+            # Float32 rows were stored unnormalized; other mismatches re-encode
+            return self.append(memory_id, codes.astype(np.float32) * np.float32(scale), topic, context)
+        self._insert(memory_id, codes, scale, topic, context)
+        return True
+
+    def _insert(self, memory_id: str, codes: np.ndarray, scale: float,
+                topic: Optional[str], context: Optional[str]):
+        with self._lock:
+            if self.size == len(self._matrix):
+                self._grow(max(64, 2 * len(self._matrix)))
+
+            self._matrix[self.size] = codes
+            self._scales[self.size] = scale
+            self._topic_codes[self.size] = self._code("topic", topic)
+            self._context_codes[self.size] = self._code("context", context)
+            self._ids.append(memory_id)
+            # Publish the row only after it is fully written
+            self.size += 1
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        similarity_threshold: float = None,
+        topic: str = None,
+        context: str = None
+    ) -> List[Tuple[str, float]]:
+        """Top-k (memory id, similarity) pairs, most similar first"""
+        size = self.size
+        matrix, scales = self._matrix[:size], self._scales[:size]
+        rows = None
+
+        if topic:
+            code = self._codes["topic"].get(topic)
+            if code is None:
+                return []
+            rows = np.flatnonzero(self._topic_codes[:size] == code)
+        if context:
+            code = self._codes["context"].get(context)
+            if code is None:
+                return []
+            mask = self._context_codes[:size] == code
+            rows = np.flatnonzero(mask) if rows is None else rows[mask[rows]]
+        if rows is not None:
+            matrix, scales = matrix[rows], scales[rows]
+
+        scores = quantization.scores(matrix, scales, EmbeddingService.normalize(query_embedding))
+        ranked = EmbeddingService.select_top_k(scores, top_k, similarity_threshold)
+        if rows is not None:
+            return [(self._ids[rows[i]], score) for i, score in ranked]
+        return [(self._ids[i], score) for i, score in ranked]
+
+    @property
+    def nbytes(self) -> int:
+        return (self._matrix.nbytes + self._scales.nbytes + self._topic_codes.nbytes
+                + self._context_codes.nbytes + self.size * self.ROW_OVERHEAD_BYTES)
+
+    def _grow(self, capacity: int):
+        matrix = np.zeros((capacity, self.dimension), dtype=self._matrix.dtype)
+        matrix[:self.size] = self._matrix[:self.size]
+        scales = np.ones(capacity, dtype=np.float32)
+        scales[:self.size] = self._scales[:self.size]
+        topic_codes = np.zeros(capacity, dtype=np.int32)
+        topic_codes[:self.size] = self._topic_codes[:self.size]
+        context_codes = np.zeros(capacity, dtype=np.int32)
+        context_codes[:self.size] = self._context_codes[:self.size]
+        # Searches already running keep reading the old arrays
+        self._matrix, self._scales = matrix, scales
+        self._topic_codes, self._context_codes = topic_codes, context_codes
+
+    def _code(self, field: str, value: Optional[str]) -> int:
+        codes = self._codes[field]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+
+class EmbeddingIndex:
+    """Per-user embedding indexes with LRU eviction under a memory budget"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, storage: str = "float32",
+                 refresh_seconds: float = 5.0):
+        self.max_bytes = max_bytes
+        self.storage = quantization.check_format(storage)
+        self.refresh_seconds = refresh_seconds
+        self.loads = 0
+        self.evictions = 0
+        self.stale_reloads = 0
+        self._users: "OrderedDict[str, UserEmbeddingIndex]" = OrderedDict()
+        # Bumped on every write so a load that raced with a store is discarded
+        self._versions: Dict[str, int] = defaultdict(int)
+        # user -> [(count, newest created_at) in the database, monotonic time last checked]
+        self._fingerprints: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[UserEmbeddingIndex]:
+        """The user's index if it is loaded, marking it recently used"""
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is not None:
+                self._users.move_to_end(user_id)
+            return index
+
+    def version(self, user_id: str) -> int:
+        with self._lock:
+            return self._versions[user_id]
+
+    def needs_check(self, user_id: str) -> bool:
+        """True when the loaded index is due to be compared with the database"""
+        with self._lock:
+            entry = self._fingerprints.get(user_id)
+            return entry is None or time.monotonic() - entry[1] >= self.refresh_seconds
+
+    def confirm(self, user_id: str, fingerprint: Tuple[int, Any]) -> bool:
+        """Compare the database fingerprint; a mismatch drops the index and returns False"""
+        with self._lock:
+            entry = self._fingerprints.get(user_id)
+            if entry is not None and tuple(entry[0]) == tuple(fingerprint):
+                entry[1] = time.monotonic()
+                return True
+            self._versions[user_id] += 1
+            self._fingerprints.pop(user_id, None)
+            if self._users.pop(user_id, None) is not None:
+                self.stale_reloads += 1
+            return False
+
+    def load(self, user_id: str, rows: List[Tuple[str, bytes, str, str]], dimension: int,
+             version: int, fingerprint: Optional[Tuple[int, Any]] = None) -> UserEmbeddingIndex:
+        """
+        Build a user's index from (id, embedding bytes, topic, context) rows
+
+        The index is only kept if nothing was stored for the user since
+        `version` was read; otherwise it serves this search and is dropped.
+        fingerprint is the database's (count, newest created_at) read
+        before the rows.
+        """
+        index = UserEmbeddingIndex(dimension, capacity=max(64, len(rows)), storage=self.storage)
+        for memory_id, embedding, topic, context in rows:
+            if embedding:
+                index.append_encoded(str(memory_id), embedding, topic, context)
+
+        with self._lock:
+            self.loads += 1
+            if self._versions[user_id] == version:
+                self._users[user_id] = index
+                self._users.move_to_end(user_id)
+                if fingerprint is not None:
+                    self._fingerprints[user_id] = [tuple(fingerprint), time.monotonic()]
+                self._evict()
+        return index
+
+    def append(self, user_id: str, memory_id: str, embedding: np.ndarray,
+               topic: str = None, context: str = None, created_at: Any = None):
+        """Add a freshly stored memory to the user's index if it is loaded"""
+        with self._lock:
+            self._versions[user_id] += 1
+            index = self._users.get(user_id)
+            entry = self._fingerprints.get(user_id)
+            if entry is not None:
+                # Our own write: expect one more row, so only other writers cause a reload
+                count, newest = entry[0]
+                if created_at is not None and (newest is None or created_at > newest):
+                    newest = created_at
+                entry[0] = (count + 1, newest)
+        if index is None:
+            return
+
+        index.append(memory_id, embedding, topic, context)
+        with self._lock:
+            self._evict()
+
+    def invalidate(self, user_id: str):
+        """Drop a user's index, e.g. after memories were deleted"""
+        with self._lock:
+            self._versions[user_id] += 1
+            self._users.pop(user_id, None)
+            self._fingerprints.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "rows": sum(index.size for index in self._users.values()),
+                "bytes": sum(index.nbytes for index in self._users.values()),
+                "max_bytes": self.max_bytes,
+                "storage": self.storage,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "stale_reloads": self.stale_reloads
+            }
+
+    def _evict(self):
+        """Drop least recently used users until under budget; caller holds the lock"""
+        total = sum(index.nbytes for index in self._users.values())
+        # The most recently used user is kept even if it alone exceeds the budget
+        while total > self.max_bytes and len(self._users) > 1:
+            user_id, index = self._users.popitem(last=False)
+            self._fingerprints.pop(user_id, None)
+            total -= index.nbytes
+            self.evictions += 1
+
+
+# Global instance
+_embedding_index: Optional[EmbeddingIndex] = None
+_embedding_index_lock = threading.Lock()
+
+
+def get_embedding_index(max_mb: int = 256, storage: str = "float32",
+                        refresh_seconds: float = 5.0) -> EmbeddingIndex:
+    """Get or create the process-wide embedding index"""
+    global _embedding_index
+    with _embedding_index_lock:
+        if _embedding_index is None:
+            _embedding_index = EmbeddingIndex(max_bytes=max_mb * 1024 * 1024, storage=storage,
+                                              refresh_seconds=refresh_seconds)
+    return _embedding_index
@@ -0,0 +1,235 @@
+"""
+Streaming document ingestion for RAG memory
+
+Large inputs - PDFs, reading notes, exported transcripts - flow through a
+chain of generators: a reader yields pages or file blocks,
+RAGMemoryEngine.iter_chunks cuts them into overlapping chunks without
+materializing the document, and fixed-size batches of chunks are embedded
+in one call and bulk-inserted with RAGMemoryEngine.store_memories.
+
+Each chunk's memory id is derived from (user, document, chunking, chunk
+index), so re-inserting a chunk is a no-op. After every stored batch the
+document's checkpoint records how many chunks are done; a rerun skips
+straight past them without embedding, and a completed document is not
+touched again unless forced.
+"""
+
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def read_text_file(path: str, block_size: int = 64 * 1024) -> Iterator[str]:
+    """Yield a text file in blocks"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
+
+
+def read_pdf_pages(path: str) -> Iterator[str]:
+    """Yield the text of each PDF page, one page in memory at a time"""
+    import PyPDF2
+
+    with open(path, "rb") as f:
+        for page in PyPDF2.PdfReader(f).pages:
+            text = page.extract_text() or ""
+            if text:
+                yield text + "\n"
+
+
+def read_document(path: str) -> Iterator[str]:
+    """Pick a reader by file extension"""
+    if path.lower().endswith(".pdf"):
+        return read_pdf_pages(path)
+    return read_text_file(path)
+
+
+class IngestCheckpoints:
+    """Per-document progress in a local SQLite file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().execute("""
+            CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+                user_id TEXT NOT NULL,
+                document_id TEXT NOT NULL,
+                chunk_size INTEGER NOT NULL,
+                overlap INTEGER NOT NULL,
+                chunks_done INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT,
+                PRIMARY KEY (user_id, document_id)
+            )
+        """)
+
+    def get(self, user_id: str, document_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            """SELECT chunk_size, overlap, chunks_done, completed, updated_at
+               FROM ingest_checkpoints WHERE user_id = ? AND document_id = ?""",
+            (user_id, document_id)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "chunk_size": row[0],
+            "overlap": row[1],
+            "chunks_done": row[2],
+            "completed": bool(row[3]),
+            "updated_at": row[4]
+        }
+
+    def save(self, user_id: str, document_id: str, chunk_size: int, overlap: int,
+             chunks_done: int, completed: bool = False):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO ingest_checkpoints
+                   (user_id, document_id, chunk_size, overlap, chunks_done, completed, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (user_id, document_id, chunk_size, overlap, chunks_done, int(completed),
+                 datetime.utcnow().isoformat())
+            )
+
+    def clear(self, user_id: str, document_id: str):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM ingest_checkpoints WHERE user_id = ? AND document_id = ?",
+                         (user_id, document_id))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+class DocumentIngestor:
+    """Chunk, batch-embed and bulk-store documents with resumable checkpoints"""
+
+    def __init__(self, engine=None, checkpoints: IngestCheckpoints = None, batch_size: int = None):
+        from config.settings import config
+        if engine is None:
+            from memory.rag_engine import get_rag_engine
+            engine = get_rag_engine()
+        self.engine = engine
+        self.checkpoints = checkpoints or IngestCheckpoints(config.RAG_INGEST_CHECKPOINT_PATH)
+        self.batch_size = max(1, batch_size or config.RAG_INGEST_BATCH_SIZE)
+        self.default_chunk_size = config.RAG_CHUNK_SIZE
+        self.default_overlap = config.RAG_CHUNK_OVERLAP
+
+    @staticmethod
+    def chunk_id(user_id: str, document_id: str, chunk_size: int, overlap: int, index: int) -> str:
+        """Deterministic memory id, so a re-stored chunk is recognised as a duplicate"""
+        name = f"rag-ingest:{user_id}:{document_id}:{chunk_size}:{overlap}:{index}"
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, name))
+
+    def iter_ingest(
+        self,
+        user_id: str,
+        document_id: str,
+        source: Union[str, Iterable[str]],
+        topic: str,
+        context: str = "document",
+        message_type: str = "document_chunk",
+        chunk_size: int = None,
+        overlap: int = None,
+        force: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Ingest a document, yielding progress after each stored batch
+
+        source is the whole text or an iterable of pieces (see
+        read_document). Progress dicts carry document_id, chunks_done,
+        stored (new rows so far), duplicates and resumed_from.
+        """
+        chunk_size = chunk_size or self.default_chunk_size
+        overlap = self.default_overlap if overlap is None else overlap
+
+        checkpoint = None if force else self.checkpoints.get(user_id, document_id)
+        if checkpoint and (checkpoint["chunk_size"], checkpoint["overlap"]) != (chunk_size, overlap):
+            # Different chunking means different chunks; start over
+            checkpoint = None
+        resumed_from = checkpoint["chunks_done"] if checkpoint else 0
+        progress = {
+            "document_id": document_id,
+            "chunks_done": resumed_from,
+            "stored": 0,
+            "duplicates": 0,
+            "resumed_from": resumed_from,
+            "completed": False
+        }
+        if checkpoint and checkpoint["completed"]:
+            logger.info(f"Document {document_id} already ingested for user {user_id}")
+            yield dict(progress, completed=True)
+            return
+
+        chunks = itertools.islice(self.engine.iter_chunks(source, chunk_size, overlap), resumed_from, None)
+        while True:
+            batch = list(itertools.islice(chunks, self.batch_size))
+            if not batch:
+                break
+
+            first = progress["chunks_done"]
+            memory_ids = [
+                self.chunk_id(user_id, document_id, chunk_size, overlap, first + i)
+                for i in range(len(batch))
+            ]
+            stored = self.engine.store_memories(user_id, batch, topic, context,
+                                                message_type=message_type, memory_ids=memory_ids)
+
+            progress["chunks_done"] += len(batch)
+            progress["stored"] += sum(1 for memory_id in stored if memory_id is not None)
+            progress["duplicates"] += sum(1 for memory_id in stored if memory_id is None)
+            self.checkpoints.save(user_id, document_id, chunk_size, overlap, progress["chunks_done"])
+            yield dict(progress)
+
+        self.checkpoints.save(user_id, document_id, chunk_size, overlap, progress["chunks_done"],
+                              completed=True)
+        progress["completed"] = True
+        logger.info(f"Ingested document {document_id} for user {user_id}: "
+                    f"{progress['chunks_done']} chunks, {progress['stored']} new")
+        yield dict(progress)
+
+    def ingest(self, user_id: str, document_id: str, source: Union[str, Iterable[str]],
+               topic: str, **kwargs) -> Dict[str, Any]:
+        """Run iter_ingest to the end and return the final progress"""
+        progress: Dict[str, Any] = {}
+        for progress in self.iter_ingest(user_id, document_id, source, topic, **kwargs):
+            pass
+        return progress
+
+    def ingest_file(self, user_id: str, path: str, topic: str, document_id: str = None,
+                    **kwargs) -> Dict[str, Any]:
+        """Ingest a PDF or text file; the document id defaults to its absolute path"""
+        return self.ingest(user_id, document_id or os.path.abspath(path), read_document(path),
+                           topic, **kwargs)
+
+
+# Global instance
+_document_ingestor: Optional[DocumentIngestor] = None
+_document_ingestor_lock = threading.Lock()
+
+
+def get_document_ingestor() -> DocumentIngestor:
+    """Get or create the document ingestor over the shared RAG engine"""
+    global _document_ingestor
+    with _document_ingestor_lock:
+        if _document_ingestor is None:
+            _document_ingestor = DocumentIngestor()
+    return _document_ingestor
@@ -7,14 +7,17 @@ import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, or_, func
 
 from config.database import DatabaseManager
 from database.models import (
     ConversationMemory, VectorEmbedding, InterviewSession,
     UserProgress, WeaknessAnalysis
 )
-from memory.rag_engine import EmbeddingService
+from config.settings import config
+from memory.rag_engine import EmbeddingService, keyword_terms, keyword_score
+from memory.embedding_index import get_embedding_index
+from memory import quantization
 from cache.redis_manager import CacheManager
 
 logger = logging.getLogger(__name__)
@@ -31,8 +34,18 @@ class PostgreSQLMemoryManager:
         self.user_id = user_id
         self.db_manager = DatabaseManager()
         self.embedding_service = EmbeddingService()
-        self.embedding_service.initialize()
+        # Loads in the background; searches fall back to keywords until it is ready
+        self.embedding_service.warm_up()
         self.cache = CacheManager()
+        self.embedding_index = get_embedding_index(max_mb=config.EMBEDDING_INDEX_MAX_MB,
+                                                   storage=config.EMBEDDING_INDEX_FORMAT,
+                                                   refresh_seconds=config.EMBEDDING_INDEX_REFRESH_SECONDS)
+        # 'mmap' shares one on-disk copy of the vectors between worker processes;
+        # 'pgvector' ranks and filters inside PostgreSQL
+        self.vector_store = None
+        if config.VECTOR_STORE_BACKEND in ('mmap', 'pgvector'):
+            from memory.vector_store import get_vector_store
+            self.vector_store = get_vector_store()
     
     def store_conversation(
         self,
@@ -66,7 +79,7 @@ class PostgreSQLMemoryManager:
                     topic=topic,
                     context=context,
                     message=message,
-                    embedding=embedding_vector.tobytes(),  # Store as bytes
+                    embedding=quantization.encode(embedding_vector, config.EMBEDDING_STORAGE_FORMAT),
                     relevance_keywords=relevance_keywords or [],
                     message_type=message_type,
                     created_at=datetime.utcnow()
@@ -75,14 +88,23 @@ class PostgreSQLMemoryManager:
                 session.add(memory)
                 session.commit()
                 
-                # Also create vector embedding record
-                vec_embedding = VectorEmbedding(
-                    memory_id=memory.id,
-                    vector=embedding_vector.tolist(),  # Store as array
-                    model_name='sentence-transformers/all-MiniLM-L6-v2'
-                )
-                session.add(vec_embedding)
-                session.commit()
+                # Optional float array copy; ConversationMemory.embedding is what searches read
+                if config.STORE_VECTOR_EMBEDDINGS:
+                    vec_embedding = VectorEmbedding(
+                        memory_id=memory.id,
+                        vector=embedding_vector.tolist(),  # Store as array
+                        model_name='sentence-transformers/all-MiniLM-L6-v2'
+                    )
+                    session.add(vec_embedding)
+                    session.commit()
+                
+                if self.vector_store:
+                    self.vector_store.add(str(memory.id), str(self.user_id), embedding_vector,
+                                          topic=topic, context=context, message_type=message_type,
+                                          created_at=memory.created_at)
+                else:
+                    self.embedding_index.append(self.user_id, str(memory.id), embedding_vector, topic, context,
+                                                created_at=memory.created_at)
                 
                 logger.info(f"Stored memory {memory.id} for user {self.user_id}")
                 
@@ -124,57 +146,46 @@ class PostgreSQLMemoryManager:
                 logger.debug(f"Cache hit for search: {query[:30]}")
                 return cached
             
+            if not self.embedding_service.is_ready():
+                # Not cached: full results replace these once the model is up
+                return self._keyword_search(query, topic, context, top_k)
+            
             with DatabaseManager.get_session_context() as session:
                 # Generate query embedding
                 query_embedding = self.embedding_service.embed(query)
                 
-                # Get all user memories
-                query_obj = session.query(ConversationMemory).filter(
-                    ConversationMemory.user_id == self.user_id
-                )
-                
-                if topic:
-                    query_obj = query_obj.filter(ConversationMemory.topic == topic)
-                if context:
-                    query_obj = query_obj.filter(ConversationMemory.context == context)
+                ranked = self._rank_memories(session, query_embedding, top_k,
+                                             similarity_threshold, topic, context)
                 
-                memories = query_obj.all()
+                # Only the winners are read in full
+                memories = {}
+                if ranked:
+                    memories = {
+                        str(memory.id): memory
+                        for memory in session.query(ConversationMemory).filter(
+                            ConversationMemory.id.in_([memory_id for memory_id, _ in ranked])
+                        ).all()
+                    }
                 
-                # Calculate similarities
                 results = []
-                for memory in memories:
-                    import numpy as np
-                    memory_embedding = np.frombuffer(memory.embedding, dtype=np.float32)
+                for memory_id, similarity in ranked:
+                    memory = memories.get(memory_id)
+                    if memory is None:
+                        continue
+                    results.append({
+                        "id": memory_id,
+                        "topic": memory.topic,
+                        "context": memory.context,
+                        "message": memory.message,
+                        "type": memory.message_type,
+                        "similarity": similarity,
+                        "created_at": memory.created_at.isoformat(),
+                        "access_count": memory.access_count
+                    })
                     
-                    # Cosine similarity
-                    similarity = self.embedding_service.similarity(
-                        query_embedding,
-                        memory_embedding
-                    )
-                    
-                    if similarity >= similarity_threshold:
-                        results.append({
-                            "id": str(memory.id),
-                            "topic": memory.topic,
-                            "context": memory.context,
-                            "message": memory.message,
-                            "type": memory.message_type,
-                            "similarity": float(similarity),
-                            "created_at": memory.created_at.isoformat(),
-                            "access_count": memory.access_count
-                        })
-                
-                # Sort by similarity
-                results = sorted(results, key=lambda x: x['similarity'], reverse=True)[:top_k]
-                
-                # Update access counts
-                for result in results:
-                    mem = session.query(ConversationMemory).filter(
-                        ConversationMemory.id == result['id']
-                    ).first()
-                    if mem:
-                        mem.access_count += 1
-                        mem.accessed_at = datetime.utcnow()
+                    # Update access counts
+                    memory.access_count += 1
+                    memory.accessed_at = datetime.utcnow()
                 session.commit()
                 
                 # Cache results
@@ -187,6 +198,126 @@ class PostgreSQLMemoryManager:
             logger.error(f"Failed to search memories: {e}")
             return []
     
+    def _keyword_search(self, query: str, topic: str = None, context: str = None,
+                        top_k: int = 5, scan_limit: int = 1000) -> List[Dict[str, Any]]:
+        """Degraded retrieval by query-term overlap while the embedding model loads"""
+        terms = keyword_terms(query)
+        if not terms:
+            return []
+        
+        logger.info(f"Embedding model not ready, keyword search for user {self.user_id}")
+        with DatabaseManager.get_session_context() as session:
+            query_obj = session.query(ConversationMemory).filter(
+                ConversationMemory.user_id == self.user_id,
+                or_(*[ConversationMemory.message.ilike(f"%{term}%") for term in terms])
+            )
+            if topic:
+                query_obj = query_obj.filter(ConversationMemory.topic == topic)
+            if context:
+                query_obj = query_obj.filter(ConversationMemory.context == context)
+            
+            results = [
+                {
+                    "id": str(memory.id),
+                    "topic": memory.topic,
+                    "context": memory.context,
+                    "message": memory.message,
+                    "type": memory.message_type,
+                    "similarity": keyword_score(terms, f"{memory.topic} {memory.message}"),
+                    "created_at": memory.created_at.isoformat(),
+                    "access_count": memory.access_count,
+                    "match": "keyword"
+                }
+                for memory in query_obj.order_by(desc(ConversationMemory.created_at)).limit(scan_limit)
+            ]
+        
+        results.sort(key=lambda result: result["similarity"], reverse=True)
+        return results[:top_k]
+    
+    def _rank_memories(self, session: Session, query_embedding, top_k: int,
+                       similarity_threshold: float, topic: str = None,
+                       context: str = None) -> List[tuple]:
+        """(memory id, similarity) pairs from the configured vector backend"""
+        if self.vector_store:
+            return [
+                (match["id"], match["similarity"])
+                for match in self.vector_store.search(
+                    str(self.user_id), query_embedding, top_k=top_k,
+                    similarity_threshold=similarity_threshold, topic=topic, context=context
+                )
+            ]
+        
+        # Score against the user's in-memory index, loading it on first use and
+        # reloading it when another worker has changed the user's memories
+        index = self.embedding_index.get(self.user_id)
+        if index is not None and self.embedding_index.needs_check(self.user_id):
+            if not self.embedding_index.confirm(self.user_id, self._index_fingerprint(session)):
+                index = None
+        if index is None:
+            index = self._load_embedding_index(session, query_embedding.shape[-1])
+        
+        return index.search(
+            query_embedding,
+            top_k=top_k,
+            similarity_threshold=similarity_threshold,
+            topic=topic,
+            context=context
+        )
+    
+    def backfill_vector_store(self) -> int:
+        """Copy the user's existing memories into the on-disk vector store"""
+        if not self.vector_store:
+            return 0
+        
+        added = 0
+        with DatabaseManager.get_session_context() as session:
+            rows = session.query(
+                ConversationMemory.id,
+                ConversationMemory.embedding,
+                ConversationMemory.topic,
+                ConversationMemory.context,
+                ConversationMemory.message_type,
+                ConversationMemory.created_at
+            ).filter(
+                ConversationMemory.user_id == self.user_id
+            ).all()
+            
+            for memory_id, embedding, topic, context, message_type, created_at in rows:
+                vector = quantization.dequantize(embedding, self.vector_store.dimension) if embedding else None
+                if vector is None:
+                    continue
+                if self.vector_store.add(str(memory_id), str(self.user_id), vector, topic=topic,
+                                         context=context, message_type=message_type,
+                                         created_at=created_at) is not None:
+                    added += 1
+        
+        logger.info(f"Backfilled {added} memories into the vector store for user {self.user_id}")
+        return added
+    
+    def _index_fingerprint(self, session: Session) -> tuple:
+        """(count, newest created_at) of the user's memories, to detect other writers"""
+        return tuple(session.query(
+            func.count(ConversationMemory.id),
+            func.max(ConversationMemory.created_at)
+        ).filter(
+            ConversationMemory.user_id == self.user_id
+        ).one())
+    
+    def _load_embedding_index(self, session: Session, dimension: int):
+        """Read the user's memory vectors once and build their in-memory index"""
+        version = self.embedding_index.version(self.user_id)
+        fingerprint = self._index_fingerprint(session)
+        rows = session.query(
+            ConversationMemory.id,
+            ConversationMemory.embedding,
+            ConversationMemory.topic,
+            ConversationMemory.context
+        ).filter(
+            ConversationMemory.user_id == self.user_id
+        ).all()
+        
+        return self.embedding_index.load(self.user_id, rows, dimension, version, fingerprint)
+    
     def get_interview_context(self, interview_id: str) -> Dict[str, Any]:
         """Get RAG context for interview preparation"""
         try:
@@ -256,14 +387,20 @@ class PostgreSQLMemoryManager:
             with DatabaseManager.get_session_context() as session:
                 cutoff_date = datetime.utcnow() - timedelta(days=days)
                 
-                count = session.query(ConversationMemory).filter(
+                expired = session.query(ConversationMemory).filter(
                     and_(
                         ConversationMemory.user_id == self.user_id,
                         ConversationMemory.created_at < cutoff_date
                     )
-                ).delete()
+                )
+                expired_ids = [str(row.id) for row in expired.with_entities(ConversationMemory.id)] \
+                    if self.vector_store else []
+                count = expired.delete()
                 
                 session.commit()
+                self.embedding_index.invalidate(self.user_id)
+                if expired_ids:
+                    self.vector_store.delete(expired_ids)
                 logger.info(f"Deleted {count} old memories for user {self.user_id}")
                 
                 return count
@@ -0,0 +1,300 @@
+"""
+PostgreSQL + pgvector store for conversation embeddings
+
+Vectors live in a vector(N) column of memory_vectors next to the memory's
+user, topic and context, under an HNSW (or IVFFlat) cosine index. A search
+is one query - the user/topic/context filter and the ORDER BY
+embedding <=> query LIMIT k ranking both run in the database - so only the
+k winners ever reach Python. Same interface as MmapVectorStore, which is
+the single-node fallback when PostgreSQL or the extension is unavailable.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+
+from config.database import DatabaseManager
+from memory.rag_engine import EmbeddingService, keyword_terms, keyword_score
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("hnsw", "ivfflat")
+
+
+def vector_literal(vector: np.ndarray) -> str:
+    """pgvector's text form, '[x1,x2,...]', cast with CAST(:param AS vector)"""
+    return "[" + ",".join("%.8g" % value for value in vector) + "]"
+
+
+class PgVectorStore:
+    """Vectors in a pgvector column, ranked by the database's ANN index"""
+
+    def __init__(self, dimension: int = 384, index_type: str = "hnsw", ef_search: int = 40,
+                 probes: int = 10, ivf_lists: int = 100, table: str = "memory_vectors"):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown pgvector index '{index_type}', expected hnsw or ivfflat")
+        self.dimension = dimension
+        self.index_type = index_type
+        self.ef_search = ef_search
+        self.probes = probes
+        self.ivf_lists = ivf_lists
+        self.table = table
+
+        DatabaseManager.initialize()
+        self.engine = DatabaseManager._engine
+        self.extension_version = self._init_schema()
+        # pgvector 0.8+ keeps scanning the index until k rows pass the filters
+        self.iterative_scan = self._version_tuple(self.extension_version) >= (0, 8)
+
+    def add(
+        self,
+        memory_id: str,
+        user_id: str,
+        embedding: np.ndarray,
+        topic: str = None,
+        context: str = None,
+        message: str = None,
+        message_type: str = None,
+        created_at: datetime = None
+    ) -> Optional[str]:
+        """Insert one vector; returns the memory id, or None if it is already stored"""
+        return self.add_many([{
+            "memory_id": memory_id,
+            "user_id": user_id,
+            "embedding": embedding,
+            "topic": topic,
+            "context": context,
+            "message": message,
+            "message_type": message_type,
+            "created_at": created_at
+        }])[0]
+
+    def add_many(self, items: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Insert vectors in one transaction; items carry add()'s arguments
+
+        Returns memory ids in item order, None for memories already stored.
+        """
+        if not items:
+            return []
+        vectors = EmbeddingService.normalize(np.stack([item["embedding"] for item in items]))
+        if vectors.shape[1:] != (self.dimension,):
+            raise ValueError(f"Expected {self.dimension}-dim embeddings, got {vectors.shape[1:]}")
+
+        memory_ids = [item["memory_id"] for item in items]
+        now = datetime.utcnow()
+        with self.engine.begin() as conn:
+            existing = {
+                row[0] for row in conn.execute(
+                    text(f"SELECT memory_id FROM {self.table} WHERE memory_id = ANY(:memory_ids)"),
+                    {"memory_ids": memory_ids}
+                )
+            }
+            fresh = [
+                {
+                    "memory_id": item["memory_id"],
+                    "user_id": item["user_id"],
+                    "topic": item.get("topic"),
+                    "context": item.get("context"),
+                    "message": item.get("message"),
+                    "message_type": item.get("message_type"),
+                    "created_at": item.get("created_at") or now,
+                    "embedding": vector_literal(vector)
+                }
+                for item, vector in zip(items, vectors) if item["memory_id"] not in existing
+            ]
+            if fresh:
+                conn.execute(text(f"""
+                    INSERT INTO {self.table}
+                        (memory_id, user_id, topic, context, message, message_type, created_at, embedding)
+                    VALUES (:memory_id, :user_id, :topic, :context, :message, :message_type,
+                            :created_at, CAST(:embedding AS vector))
+                    ON CONFLICT (memory_id) DO NOTHING
+                """), fresh)
+
+        stored = []
+        for memory_id in memory_ids:
+            stored.append(None if memory_id in existing else memory_id)
+            existing.add(memory_id)
+        return stored
+
+    def search(
+        self,
+        user_id: str,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        similarity_threshold: float = None,
+        topic: str = None,
+        context: str = None
+    ) -> List[Dict[str, Any]]:
+        """Top-k of the user's rows by cosine similarity, most similar first"""
+        if top_k <= 0:
+            return []
+
+        where, params = self._filters(user_id, topic, context)
+        params.update(query=vector_literal(EmbeddingService.normalize(query_embedding)), top_k=top_k)
+        sql = f"""
+            SELECT memory_id, topic, context, message, message_type, created_at,
+                   1 - (embedding <=> CAST(:query AS vector)) AS similarity
+            FROM {self.table}
+            WHERE {where}
+            ORDER BY embedding <=> CAST(:query AS vector)
+            LIMIT :top_k
+        """
+        if similarity_threshold is not None:
+            # Outside the ranked subquery so the index still drives the ORDER BY
+            sql = f"SELECT * FROM ({sql}) ranked WHERE similarity >= :threshold"
+            params["threshold"] = similarity_threshold
+
+        with self.engine.begin() as conn:
+            self._tune_scan(conn)
+            records = conn.execute(text(sql), params).fetchall()
+
+        matches = [self._record(record, similarity=float(record[6])) for record in records]
+        # relaxed_order iterative scans may return near-ties out of order
+        matches.sort(key=lambda match: match["similarity"], reverse=True)
+        return matches
+
+    def keyword_search(
+        self,
+        user_id: str,
+        query: str,
+        top_k: int = 5,
+        topic: str = None,
+        context: str = None,
+        scan_limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """Rank the user's recent rows by query-term overlap; used while the model loads"""
+        terms = keyword_terms(query)
+        if not terms:
+            return []
+
+        where, params = self._filters(user_id, topic, context)
+        clauses = []
+        for i, term in enumerate(terms):
+            clauses.append(f"message ILIKE :term{i} OR topic ILIKE :term{i}")
+            params[f"term{i}"] = f"%{term}%"
+        params["scan_limit"] = scan_limit
+
+        with self.engine.connect() as conn:
+            records = conn.execute(text(f"""
+                SELECT memory_id, topic, context, message, message_type, created_at
+                FROM {self.table}
+                WHERE {where} AND ({" OR ".join(clauses)})
+                ORDER BY created_at DESC
+                LIMIT :scan_limit
+            """), params).fetchall()
+
+        matches = [
+            self._record(record, similarity=keyword_score(terms, f"{record[1]} {record[3]}"), match="keyword")
+            for record in records
+        ]
+        matches.sort(key=lambda match: match["similarity"], reverse=True)
+        return matches[:top_k]
+
+    def contains(self, memory_id: str) -> bool:
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT 1 FROM {self.table} WHERE memory_id = :memory_id"),
+                                {"memory_id": memory_id}).fetchone() is not None
+
+    def delete(self, memory_ids: List[str]) -> int:
+        if not memory_ids:
+            return 0
+        with self.engine.begin() as conn:
+            return conn.execute(text(f"DELETE FROM {self.table} WHERE memory_id = ANY(:memory_ids)"),
+                                {"memory_ids": list(memory_ids)}).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(f"SELECT COUNT(*) FROM {self.table}")).scalar()
+            size = conn.execute(text("SELECT pg_total_relation_size(CAST(:table AS regclass))"),
+                                {"table": self.table}).scalar()
+        return {
+            "backend": "pgvector",
+            "extension_version": self.extension_version,
+            "dimension": self.dimension,
+            "index": self.index_type,
+            "rows": rows,
+            "live_rows": rows,
+            "bytes": size
+        }
+
+    def _filters(self, user_id: str, topic: str = None, context: str = None):
+        where = ["user_id = :user_id"]
+        params: Dict[str, Any] = {"user_id": user_id}
+        if topic:
+            where.append("topic = :topic")
+            params["topic"] = topic
+        if context:
+            where.append("context = :context")
+            params["context"] = context
+        return " AND ".join(where), params
+
+    def _tune_scan(self, conn):
+        """Per-transaction search breadth for the ANN index"""
+        if self.index_type == "hnsw":
+            conn.execute(text(f"SET LOCAL hnsw.ef_search = {int(self.ef_search)}"))
+            if self.iterative_scan:
+                conn.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+        else:
+            conn.execute(text(f"SET LOCAL ivfflat.probes = {int(self.probes)}"))
+            if self.iterative_scan:
+                conn.execute(text("SET LOCAL ivfflat.iterative_scan = relaxed_order"))
+
+    @staticmethod
+    def _record(record, **extra) -> Dict[str, Any]:
+        memory_id, topic, context, message, message_type, created_at = record[:6]
+        return dict({
+            "id": memory_id,
+            "topic": topic,
+            "context": context,
+            "message": message,
+            "type": message_type,
+            "created_at": created_at.isoformat() if created_at else None
+        }, **extra)
+
+    @staticmethod
+    def _version_tuple(version: str) -> tuple:
+        try:
+            return tuple(int(part) for part in version.split(".")[:2])
+        except (AttributeError, ValueError):
+            return (0, 0)
+
+    def _init_schema(self) -> str:
+        """Create the extension, table and indexes if missing; returns the pgvector version"""
+        if self.index_type == "hnsw":
+            index_sql = "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+        else:
+            index_sql = f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {int(self.ivf_lists)})"
+
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    memory_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    topic TEXT,
+                    context TEXT,
+                    message TEXT,
+                    message_type TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    embedding vector({int(self.dimension)}) NOT NULL
+                )
+            """))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_user "
+                              f"ON {self.table} (user_id, topic, context)"))
+            # IVFFlat trains its lists at build time, so it waits for enough rows;
+            # searches are exact sequential scans until then
+            rows = conn.execute(text(f"SELECT COUNT(*) FROM {self.table}")).scalar()
+            if self.index_type == "hnsw" or rows >= 10 * self.ivf_lists:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_{self.index_type} "
+                                  f"ON {self.table} {index_sql}"))
+            version = conn.execute(text(
+                "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+            )).scalar()
+
+        logger.info(f"pgvector {version} store ready ({self.table}, {self.index_type} index)")
+        return version
@@ -0,0 +1,127 @@
+"""
+Compact encodings for stored embedding vectors
+
+    float32  4 bytes per dimension, the original ConversationMemory.embedding format
+    float16  2 bytes per dimension
+    int8     1 byte per dimension plus a float32 scale per vector
+
+Quantized formats store the unit-normalized vector; only cosine similarity
+is ever computed on them. int8 codes are the vector rescaled so its largest
+component is 127, and the scale is 1 / |codes|, so scale * codes is unit
+length and a cosine score is (codes . query) * scale - the stored rows are
+never dequantized, the scale is applied to the score.
+
+Blobs carry no header. The format is recognised from the byte length for a
+known dimension (1536, 768 and 388 bytes at 384 dims), so float32 rows and
+quantized rows can coexist while a migration runs.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+FORMATS = ("float32", "float16", "int8")
+
+_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def check_format(fmt: str) -> str:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown embedding format '{fmt}', expected one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def dtype_for(fmt: str):
+    return _DTYPES[check_format(fmt)]
+
+
+def encoded_size(fmt: str, dimension: int) -> int:
+    """Bytes per stored vector"""
+    if check_format(fmt) == "int8":
+        return dimension + 4
+    return dimension * np.dtype(_DTYPES[fmt]).itemsize
+
+
+def quantize_rows(vectors: np.ndarray, fmt: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encode the rows of a matrix as (codes, scales)
+
+    float32 keeps the vectors as given, with unit scales; the other formats
+    normalize first.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.ones(len(vectors), dtype=np.float32)
+    if check_format(fmt) == "float32":
+        return vectors, scales
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = vectors / norms
+    if fmt == "float16":
+        return unit.astype(np.float16), scales
+
+    peaks = np.abs(unit).max(axis=1, keepdims=True)
+    peaks[peaks == 0] = 1.0
+    codes = np.rint(unit * (127.0 / peaks)).astype(np.int8)
+    code_norms = np.linalg.norm(codes.astype(np.float32), axis=1)
+    scales[code_norms > 0] = 1.0 / code_norms[code_norms > 0]
+    return codes, scales
+
+
+def encode(vector: np.ndarray, fmt: str) -> bytes:
+    """Pack one vector for ConversationMemory.embedding"""
+    codes, scales = quantize_rows(vector, fmt)
+    if fmt == "int8":
+        return scales[:1].tobytes() + codes[0].tobytes()
+    return codes[0].tobytes()
+
+
+def detect_format(data: bytes, dimension: int) -> Optional[str]:
+    """The format a blob was written in, or None if its length fits none"""
+    for fmt in FORMATS:
+        if len(data) == encoded_size(fmt, dimension):
+            return fmt
+    return None
+
+
+def decode(data: bytes, dimension: int) -> Optional[Tuple[np.ndarray, float, str]]:
+    """(codes, scale, format) of a stored blob without dequantizing it"""
+    fmt = detect_format(data, dimension) if data else None
+    if fmt is None:
+        return None
+    if fmt == "int8":
+        scale = float(np.frombuffer(data, dtype=np.float32, count=1)[0])
+        return np.frombuffer(data, dtype=np.int8, offset=4), scale, fmt
+    return np.frombuffer(data, dtype=_DTYPES[fmt]), 1.0, fmt
+
+
+def dequantize(data: bytes, dimension: int) -> Optional[np.ndarray]:
+    """A stored blob as a float32 vector, or None if it is not a known format"""
+    decoded = decode(data, dimension)
+    if decoded is None:
+        return None
+    codes, scale, _ = decoded
+    return codes.astype(np.float32) * np.float32(scale)
+
+
+def scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray,
+           chunk_rows: int = 4096) -> np.ndarray:
+    """
+    Dot products of a unit query with encoded rows
+
+    float32 rows are one matrix-vector product. Narrower rows are widened a
+    chunk at a time for the BLAS product, so the temporary stays at
+    chunk_rows vectors however large the matrix is, and each row's scale
+    multiplies its score rather than its vector.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    if codes.dtype == np.float32:
+        return codes @ query
+
+    result = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), chunk_rows):
+        chunk = codes[start:start + chunk_rows]
+        result[start:start + len(chunk)] = chunk.astype(np.float32) @ query
+    if codes.dtype == np.int8:
+        result *= scales
+    return result
@@ -5,7 +5,9 @@ Retrieves relevant context for agents using semantic search
 
 import numpy as np
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import re
+import threading
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime
 from config.settings import config
@@ -14,6 +16,19 @@ from cache.redis_manager import CacheManager
 logger = logging.getLogger(__name__)
 
 
+def keyword_terms(text: str) -> List[str]:
+    """Distinct lowercase words of three or more characters"""
+    return list(dict.fromkeys(word for word in re.findall(r"\w+", text.lower()) if len(word) > 2))
+
+
+def keyword_score(terms: List[str], text: str) -> float:
+    """Fraction of terms that occur in text; the degraded stand-in for similarity"""
+    if not terms:
+        return 0.0
+    text = (text or "").lower()
+    return sum(1 for term in terms if term in text) / len(terms)
+
+
 @dataclass
 class MemoryEntry:
     """Represents a memory entry with embedding"""
@@ -29,57 +44,153 @@ class MemoryEntry:
 
 
 class EmbeddingService:
-    """Generates embeddings using sentence-transformers"""
+    """Generates embeddings using sentence-transformers, cached by text hash"""
     
     _model = None
+    _cache = None
+    _batcher = None
+    _batcher_lock = threading.Lock()
+    _init_lock = threading.Lock()
+    _warmup_lock = threading.Lock()
+    _warmup_thread = None
+    _load_error = None
     
     @classmethod
     def initialize(cls):
-        """Initialize embedding model"""
+        """Initialize embedding model; concurrent callers wait for the one load"""
         if cls._model is not None:
             return
         
-        try:
-            from sentence_transformers import SentenceTransformer
-            
-            model_name = config.EMBEDDING_MODEL
-            logger.info(f"Loading embedding model: {model_name}")
-            cls._model = SentenceTransformer(model_name)
-            logger.info("Embedding model loaded successfully")
+        with cls._init_lock:
+            if cls._model is not None:
+                return
             
-        except ImportError:
-            logger.error("sentence-transformers package not installed")
-            raise
+            try:
+                from sentence_transformers import SentenceTransformer
+                
+                model_name = config.EMBEDDING_MODEL
+                logger.info(f"Loading embedding model: {model_name}")
+                cls._model = SentenceTransformer(model_name)
+                cls._load_error = None
+                logger.info("Embedding model loaded successfully")
+                
+            except ImportError as e:
+                cls._load_error = str(e)
+                logger.error("sentence-transformers package not installed")
+                raise
+            except Exception as e:
+                cls._load_error = str(e)
+                logger.error(f"Failed to initialize embedding model: {e}")
+                raise
+    
+    @classmethod
+    def warm_up(cls):
+        """Load the model and run one encode in a background thread; returns immediately"""
+        if cls._model is not None or cls._warmup_thread is not None:
+            return
+        
+        with cls._warmup_lock:
+            if cls._warmup_thread is not None:
+                return
+            cls._warmup_thread = threading.Thread(target=cls._warm_up, name="embedding-warmup", daemon=True)
+            cls._warmup_thread.start()
+    
+    @classmethod
+    def _warm_up(cls):
+        start = datetime.now()
+        try:
+            cls.initialize()
+            # The first encode pays for lazy kernel and tokenizer set-up
+            cls._model.encode("warm up", convert_to_numpy=True)
+            logger.info(f"Embedding model warm in {(datetime.now() - start).total_seconds():.1f}s")
         except Exception as e:
-            logger.error(f"Failed to initialize embedding model: {e}")
-            raise
+            logger.error(f"Embedding model warm-up failed: {e}")
+        finally:
+            cls._warmup_thread = None
+    
+    @classmethod
+    def is_ready(cls) -> bool:
+        """True once the model is loaded and embeds will not block on it"""
+        return cls._model is not None
+    
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        """Model readiness for health checks"""
+        return {
+            "model": config.EMBEDDING_MODEL,
+            "ready": cls.is_ready(),
+            "loading": cls._warmup_thread is not None and cls._model is None,
+            "error": cls._load_error
+        }
+    
+    @classmethod
+    def cache(cls):
+        """Two-tier (in-process + persistent) embedding cache"""
+        if cls._cache is None:
+            from memory.embedding_cache import get_embedding_cache
+            cls._cache = get_embedding_cache()
+        return cls._cache
+    
+    @classmethod
+    def batcher(cls):
+        """Shared micro-batching queue, or None when batching is disabled"""
+        if cls._batcher is None and config.EMBEDDING_BATCH_SIZE > 1:
+            with cls._batcher_lock:
+                if cls._batcher is None:
+                    from memory.embedding_batcher import EmbeddingBatcher
+                    cls._batcher = EmbeddingBatcher(
+                        cls._encode_and_cache,
+                        max_batch_size=config.EMBEDDING_BATCH_SIZE,
+                        max_wait_ms=config.EMBEDDING_BATCH_WAIT_MS
+                    )
+        return cls._batcher
     
     @classmethod
     def embed(cls, text: str) -> np.ndarray:
         """Generate embedding for text"""
-        if cls._model is None:
-            cls.initialize()
+        cached = cls.cache().get(text)
+        if cached is not None:
+            return cached
         
         try:
-            embedding = cls._model.encode(text, convert_to_numpy=True)
-            return embedding
+            # Concurrent misses from other request threads share one encode
+            batcher = cls.batcher()
+            if batcher is not None:
+                return batcher.embed(text)
+            return cls._encode_and_cache([text])[0]
         except Exception as e:
             logger.error(f"Embedding generation failed: {e}")
             raise
     
     @classmethod
     def embed_batch(cls, texts: List[str]) -> List[np.ndarray]:
-        """Generate embeddings for multiple texts"""
-        if cls._model is None:
-            cls.initialize()
+        """Generate embeddings for multiple texts; only cache misses are encoded"""
+        embeddings = cls.cache().get_many(texts) if texts else []
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
         
         try:
-            embeddings = cls._model.encode(texts, convert_to_numpy=True)
-            return [embedding for embedding in embeddings]
+            for i, embedding in zip(missing, cls._encode_and_cache([texts[i] for i in missing])):
+                embeddings[i] = embedding
+            return embeddings
         except Exception as e:
             logger.error(f"Batch embedding failed: {e}")
             raise
     
+    @classmethod
+    def _encode_and_cache(cls, texts: List[str]) -> List[np.ndarray]:
+        """Encode texts in one model call and cache them; one copy per input"""
+        if cls._model is None:
+            cls.initialize()
+        
+        # Duplicates are encoded once
+        unique_texts = list(dict.fromkeys(texts))
+        encoded = cls._model.encode(unique_texts, convert_to_numpy=True)
+        cls.cache().put_many(unique_texts, list(encoded))
+        by_text = dict(zip(unique_texts, encoded))
+        return [by_text[text].copy() for text in texts]
+    
     @classmethod
     def similarity(cls, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """Calculate cosine similarity between two embeddings"""
@@ -91,6 +202,56 @@ class EmbeddingService:
         
         similarity = cosine_similarity(e1, e2)[0][0]
         return float(similarity)
+    
+    @staticmethod
+    def normalize(embeddings: np.ndarray) -> np.ndarray:
+        """L2-normalize a vector or the rows of a matrix as float32; zero rows stay zero"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+    
+    @classmethod
+    def top_k_similar(
+        cls,
+        query_embedding: np.ndarray,
+        matrix: np.ndarray,
+        top_k: int,
+        similarity_threshold: float = None,
+        normalized: bool = False
+    ) -> List[Tuple[int, float]]:
+        """
+        Rank matrix rows by cosine similarity to the query
+        
+        One matrix-vector product scores every row; argpartition picks the
+        top_k candidates without sorting the rest. Rows below the threshold
+        are dropped. Pass normalized=True when the rows are already unit length.
+        
+        Returns:
+            (row index, similarity) pairs, most similar first
+        """
+        if top_k <= 0 or len(matrix) == 0:
+            return []
+        
+        if not normalized:
+            matrix = cls.normalize(matrix)
+        return cls.select_top_k(matrix @ cls.normalize(query_embedding), top_k, similarity_threshold)
+    
+    @staticmethod
+    def select_top_k(scores: np.ndarray, top_k: int,
+                     similarity_threshold: float = None) -> List[Tuple[int, float]]:
+        """(index, score) pairs of the top_k scores at or above the threshold, best first"""
+        if top_k <= 0 or len(scores) == 0:
+            return []
+        
+        candidates = np.arange(len(scores))
+        if similarity_threshold is not None:
+            candidates = np.flatnonzero(scores >= similarity_threshold)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(i), float(scores[i])) for i in order]
 
 
 class RAGMemoryEngine:
@@ -99,12 +260,28 @@ class RAGMemoryEngine:
     Uses vector similarity search to find most relevant memories
     """
     
-    def __init__(self, db_session=None, cache_manager: CacheManager = None):
+    def __init__(self, db_session=None, cache_manager: CacheManager = None, vector_store=None):
         """Initialize RAG engine"""
         self.db_session = db_session
         self.cache_manager = cache_manager or CacheManager()
         self.embedding_service = EmbeddingService()
-        self.embedding_service.initialize()
+        # Never block construction on the model; retrieval degrades until it is ready
+        self.embedding_service.warm_up()
+        if vector_store is None:
+            from memory.vector_store import get_vector_store
+            vector_store = get_vector_store()
+        self.vector_store = vector_store
+        # 'ivf' trades a little recall for sub-linear search on large memory sets;
+        # pgvector already searches through its own index
+        self.ann_index = None
+        if config.RAG_SEARCH_BACKEND == 'ivf' and hasattr(vector_store, 'user_rows'):
+            from memory.ann_index import AnnMemoryIndex
+            self.ann_index = AnnMemoryIndex(
+                vector_store,
+                n_probe=config.ANN_N_PROBE,
+                min_train_size=config.ANN_MIN_TRAIN_SIZE,
+                rebuild_seconds=config.ANN_REBUILD_SECONDS
+            )
     
     def store_memory(
         self,
@@ -133,7 +310,7 @@ class RAGMemoryEngine:
             # Generate embedding
             embedding = self.embedding_service.embed(message)
             
-            # Store to database (pseudo-code - actual depends on session)
+            # Store to the vector store
             memory_id = self._store_to_db(
                 user_id=user_id,
                 topic=topic,
@@ -144,9 +321,8 @@ class RAGMemoryEngine:
                 message_type=message_type
             )
             
-            # Also cache for quick access
-            cache_key = f"memory:{user_id}:{topic}"
-            self.cache_manager.increment_counter(cache_key)
+            # Count the topic's memories for quick access
+            self.cache_manager.increment(f"memory:{user_id}:{topic}")
             
             logger.info(f"Stored memory {memory_id} for user {user_id}")
             return memory_id
@@ -155,6 +331,50 @@ class RAGMemoryEngine:
             logger.error(f"Failed to store memory: {e}")
             raise
     
+    def store_memories(
+        self,
+        user_id: str,
+        messages: List[str],
+        topic: str,
+        context: str,
+        message_type: str = "general",
+        memory_ids: List[str] = None
+    ) -> List[Optional[str]]:
+        """
+        Store several entries with one batched embed and one bulk insert
+        
+        memory_ids makes the write idempotent: entries whose id is already
+        stored are skipped and come back as None.
+        
+        Returns:
+            Memory entry IDs in input order, None for skipped entries
+        """
+        if not messages:
+            return []
+        
+        try:
+            embeddings = self.embedding_service.embed_batch(messages)
+            stored = self._store_many_to_db(
+                user_id=user_id,
+                topic=topic,
+                context=context,
+                messages=messages,
+                embeddings=embeddings,
+                message_type=message_type,
+                memory_ids=memory_ids
+            )
+            
+            new_count = sum(1 for memory_id in stored if memory_id is not None)
+            if new_count:
+                self.cache_manager.increment(f"memory:{user_id}:{topic}", amount=new_count)
+            
+            logger.info(f"Stored {new_count} of {len(messages)} memories for user {user_id}")
+            return stored
+            
+        except Exception as e:
+            logger.error(f"Failed to store memories: {e}")
+            raise
+    
     def retrieve_context(
         self,
         user_id: str,
@@ -186,10 +406,21 @@ class RAGMemoryEngine:
                 logger.debug(f"Cache hit for RAG query: {cache_key}")
                 return cached
             
+            if not self.embedding_service.is_ready():
+                # Model still loading: keyword matches only, and not cached
+                logger.info(f"Embedding model not ready, keyword retrieval for user {user_id}")
+                return self.vector_store.keyword_search(
+                    user_id=user_id,
+                    query=query,
+                    top_k=top_k,
+                    topic=topic,
+                    context=context
+                )
+            
             # Generate query embedding
             query_embedding = self.embedding_service.embed(query)
             
-            # Retrieve from database (pseudo-code)
+            # Search the vector store
             results = self._search_memories(
                 user_id=user_id,
                 query_embedding=query_embedding,
@@ -324,34 +555,99 @@ class RAGMemoryEngine:
         Returns:
             List of text chunks
         """
-        chunk_size = chunk_size or config.RAG_CHUNK_SIZE
-        overlap = overlap or config.RAG_CHUNK_OVERLAP
+        return list(self.iter_chunks(text, chunk_size, overlap))
+    
+    def iter_chunks(self, source: Union[str, Iterable[str]], chunk_size: int = None,
+                    overlap: int = None) -> Iterator[str]:
+        """
+        Lazily split a string, or a stream of text pieces (pages, file
+        blocks), into chunk_size windows that overlap by `overlap` characters
         
-        chunks = []
-        start = 0
+        Only the unconsumed tail of the input is buffered. The last chunk is
+        whatever remains and is skipped if it would only repeat the overlap.
+        """
+        chunk_size = chunk_size or config.RAG_CHUNK_SIZE
+        overlap = config.RAG_CHUNK_OVERLAP if overlap is None else overlap
+        if not 0 <= overlap < chunk_size:
+            raise ValueError(f"overlap must be in [0, chunk_size), got {overlap} for chunk_size {chunk_size}")
+        step = chunk_size - overlap
         
-        while start < len(text):
-            end = min(start + chunk_size, len(text))
-            chunks.append(text[start:end])
-            start = end - overlap
+        buffer, start, emitted = "", 0, False
+        for piece in ([source] if isinstance(source, str) else source):
+            buffer = buffer[start:] + piece
+            start = 0
+            while len(buffer) - start >= chunk_size:
+                yield buffer[start:start + chunk_size]
+                start += step
+                emitted = True
         
-        return chunks
+        remainder = buffer[start:]
+        if remainder and not (emitted and len(remainder) <= overlap):
+            yield remainder
     
-    # Private helper methods (to be implemented with actual DB calls)
-    def _store_to_db(self, **kwargs) -> str:
-        """Store memory to database"""
-        # Pseudo-implementation
+    # Private helper methods
+    def _store_to_db(self, user_id: str, topic: str, context: str, message: str,
+                     embedding: np.ndarray, message_type: str = "general", **kwargs) -> str:
+        """Store memory in the vector store (pgvector or the local fallback)"""
         import uuid
-        return str(uuid.uuid4())
+        memory_id = str(uuid.uuid4())
+        row = self.vector_store.add(
+            memory_id=memory_id,
+            user_id=user_id,
+            embedding=embedding,
+            topic=topic,
+            context=context,
+            message=message,
+            message_type=message_type
+        )
+        if self.ann_index and row is not None:
+            self.ann_index.add(user_id, row, embedding, topic, context)
+        return memory_id
+    
+    def _store_many_to_db(self, user_id: str, topic: str, context: str, messages: List[str],
+                          embeddings: List[np.ndarray], message_type: str = "general",
+                          memory_ids: List[str] = None) -> List[Optional[str]]:
+        """Bulk-insert memories in one vector store write"""
+        import uuid
+        memory_ids = memory_ids or [str(uuid.uuid4()) for _ in messages]
+        rows = self.vector_store.add_many([
+            {
+                "memory_id": memory_id,
+                "user_id": user_id,
+                "embedding": embedding,
+                "topic": topic,
+                "context": context,
+                "message": message,
+                "message_type": message_type
+            }
+            for memory_id, message, embedding in zip(memory_ids, messages, embeddings)
+        ])
+        if self.ann_index:
+            for row, embedding in zip(rows, embeddings):
+                if row is not None:
+                    self.ann_index.add(user_id, row, embedding, topic, context)
+        return [memory_id if row is not None else None for memory_id, row in zip(memory_ids, rows)]
     
     def _search_memories(self, user_id: str, query_embedding: np.ndarray, 
                         topic: str = None, context: str = None, top_k: int = 5) -> List[Dict]:
         """Search memories using vector similarity"""
-        # This would query PostgreSQL with pgvector similarity
-        # SELECT * FROM conversation_memory 
-        # WHERE user_id = $1
-        # ORDER BY embedding <-> $2 LIMIT $3
-        return []
+        if self.ann_index:
+            return self.ann_index.search(
+                user_id=user_id,
+                query_embedding=query_embedding,
+                top_k=top_k,
+                similarity_threshold=config.RAG_SIMILARITY_THRESHOLD,
+                topic=topic,
+                context=context
+            )
+        return self.vector_store.search(
+            user_id=user_id,
+            query_embedding=query_embedding,
+            top_k=top_k,
+            similarity_threshold=config.RAG_SIMILARITY_THRESHOLD,
+            topic=topic,
+            context=context
+        )
     
     def _get_past_interviews(self, user_id: str, interview_mode: str, top_k: int = 5) -> List[Dict]:
         """Get past interview sessions"""
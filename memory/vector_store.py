@@ -0,0 +1,393 @@
+"""
+Memory-mapped on-disk vector store for conversation embeddings
+
+Vectors are L2-normalized float32 rows appended to fixed-size raw segment
+files (seg-00000.f32, ...) that searches open with np.memmap, so every
+Flask worker on the host shares one copy through the OS page cache instead
+of holding its own. A SQLite manifest maps each global row number to its
+memory id, user, topic and context; SQLite's locking serializes writers
+across processes. Rows are never rewritten: deletes are tombstones in the
+manifest.
+
+It is the single-node backend; get_vector_store returns PgVectorStore
+instead when VECTOR_STORE_BACKEND is 'pgvector' and PostgreSQL has the
+extension.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from memory.rag_engine import EmbeddingService, keyword_terms, keyword_score
+
+logger = logging.getLogger(__name__)
+
+
+class MmapVectorStore:
+    """Append-only float32 segments plus a SQLite row manifest"""
+
+    def __init__(self, root: str, dimension: int = 384, segment_rows: int = 65536):
+        self.root = root
+        self.dimension = dimension
+        self.segment_rows = segment_rows
+        self.row_bytes = dimension * 4
+        self._segments: Dict[int, np.memmap] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+        self._init_manifest()
+
+    def add(
+        self,
+        memory_id: str,
+        user_id: str,
+        embedding: np.ndarray,
+        topic: str = None,
+        context: str = None,
+        message: str = None,
+        message_type: str = None,
+        created_at: datetime = None
+    ) -> Optional[int]:
+        """Append one vector; returns its row, or None if the memory is already stored"""
+        return self.add_many([{
+            "memory_id": memory_id,
+            "user_id": user_id,
+            "embedding": embedding,
+            "topic": topic,
+            "context": context,
+            "message": message,
+            "message_type": message_type,
+            "created_at": created_at
+        }])[0]
+
+    def add_many(self, items: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """
+        Append vectors in one transaction; items carry add()'s arguments
+
+        Returns rows in item order, None for memories already stored.
+        """
+        if not items:
+            return []
+        vectors = EmbeddingService.normalize(np.stack([item["embedding"] for item in items]))
+        if vectors.shape[1:] != (self.dimension,):
+            raise ValueError(f"Expected {self.dimension}-dim embeddings, got {vectors.shape[1:]}")
+
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front, so row numbers never collide
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            memory_ids = [item["memory_id"] for item in items]
+            seen = {
+                memory_id for (memory_id,) in conn.execute(
+                    f"SELECT memory_id FROM vectors WHERE memory_id IN ({','.join('?' * len(memory_ids))})",
+                    memory_ids
+                )
+            }
+
+            next_row = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()[0]
+            rows: List[Optional[int]] = []
+            fresh = []
+            for i, item in enumerate(items):
+                if item["memory_id"] in seen:
+                    rows.append(None)
+                    continue
+                seen.add(item["memory_id"])
+                rows.append(next_row + len(fresh))
+                fresh.append(i)
+            if not fresh:
+                conn.rollback()
+                return rows
+
+            # Written at fixed offsets before the manifest commit: a crashed
+            # writer leaves unreferenced slots that the next writer reuses
+            self._write_rows(next_row, vectors[fresh])
+            now = datetime.utcnow()
+            conn.executemany(
+                """INSERT INTO vectors
+                   (row, memory_id, user_id, topic, context, message, message_type, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (rows[i], items[i]["memory_id"], items[i]["user_id"], items[i].get("topic"),
+                     items[i].get("context"), items[i].get("message"), items[i].get("message_type"),
+                     (items[i].get("created_at") or now).isoformat())
+                    for i in fresh
+                ]
+            )
+            conn.commit()
+            return rows
+        except Exception:
+            conn.rollback()
+            raise
+
+    def search(
+        self,
+        user_id: str,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        similarity_threshold: float = None,
+        topic: str = None,
+        context: str = None
+    ) -> List[Dict[str, Any]]:
+        """Top-k of the user's live rows by cosine similarity, most similar first"""
+        # Rank on row numbers alone (an index-only scan); only the winners' text is read
+        sql = "SELECT row FROM vectors WHERE user_id = ? AND deleted = 0"
+        params: List[Any] = [user_id]
+        if topic:
+            sql += " AND topic = ?"
+            params.append(topic)
+        if context:
+            sql += " AND context = ?"
+            params.append(context)
+
+        rows = [row for (row,) in self._conn().execute(sql, params)]
+        if not rows:
+            return []
+
+        ranked = EmbeddingService.top_k_similar(
+            query_embedding,
+            self._gather(rows),
+            top_k,
+            similarity_threshold=similarity_threshold,
+            normalized=True
+        )
+
+        found = self.records([rows[i] for i, _ in ranked])
+        # A row tombstoned since the scan is simply left out
+        return [
+            dict(found[rows[i]], similarity=similarity)
+            for i, similarity in ranked if rows[i] in found
+        ]
+
+    def keyword_search(
+        self,
+        user_id: str,
+        query: str,
+        top_k: int = 5,
+        topic: str = None,
+        context: str = None,
+        scan_limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """Rank the user's recent rows by query-term overlap; used while the model loads"""
+        terms = keyword_terms(query)
+        if not terms:
+            return []
+
+        sql = """SELECT memory_id, topic, context, message, message_type, created_at
+                 FROM vectors WHERE user_id = ? AND deleted = 0"""
+        params: List[Any] = [user_id]
+        if topic:
+            sql += " AND topic = ?"
+            params.append(topic)
+        if context:
+            sql += " AND context = ?"
+            params.append(context)
+        sql += " AND (" + " OR ".join(["message LIKE ? OR topic LIKE ?"] * len(terms)) + ")"
+        for term in terms:
+            params.extend([f"%{term}%", f"%{term}%"])
+        sql += " ORDER BY row DESC LIMIT ?"
+        params.append(scan_limit)
+
+        matches = []
+        for memory_id, row_topic, row_context, message, message_type, created_at in \
+                self._conn().execute(sql, params).fetchall():
+            matches.append({
+                "id": memory_id,
+                "topic": row_topic,
+                "context": row_context,
+                "message": message,
+                "type": message_type,
+                "similarity": keyword_score(terms, f"{row_topic} {message}"),
+                "created_at": created_at,
+                "match": "keyword"
+            })
+
+        matches.sort(key=lambda match: match["similarity"], reverse=True)
+        return matches[:top_k]
+
+    def user_rows(self, user_id: str):
+        """The user's live (rows, topics, contexts), oldest first"""
+        records = self._conn().execute(
+            "SELECT row, topic, context FROM vectors WHERE user_id = ? AND deleted = 0 ORDER BY row",
+            (user_id,)
+        ).fetchall()
+        if not records:
+            return [], [], []
+        rows, topics, contexts = zip(*records)
+        return list(rows), list(topics), list(contexts)
+
+    def vectors(self, rows: List[int]) -> np.ndarray:
+        """Normalized vectors for the given rows, in order"""
+        if not rows:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return self._gather(rows)
+
+    def records(self, rows: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Metadata of live rows keyed by row, in search-result shape without similarity"""
+        if not rows:
+            return {}
+        placeholders = ",".join("?" * len(rows))
+        found = self._conn().execute(
+            f"""SELECT row, memory_id, topic, context, message, message_type, created_at
+                FROM vectors WHERE deleted = 0 AND row IN ({placeholders})""",
+            list(rows)
+        ).fetchall()
+        return {
+            row: {
+                "id": memory_id,
+                "topic": topic,
+                "context": context,
+                "message": message,
+                "type": message_type,
+                "created_at": created_at
+            }
+            for row, memory_id, topic, context, message, message_type, created_at in found
+        }
+
+    def contains(self, memory_id: str) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM vectors WHERE memory_id = ?", (memory_id,)
+        ).fetchone() is not None
+
+    def delete(self, memory_ids: List[str]) -> int:
+        """Tombstone rows; their slots stay in the segment files"""
+        conn = self._conn()
+        cursor = conn.executemany("UPDATE vectors SET deleted = 1 WHERE memory_id = ?",
+                                  [(memory_id,) for memory_id in memory_ids])
+        conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        rows, live = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(deleted = 0), 0) FROM vectors"
+        ).fetchone()
+        segment_files = [name for name in os.listdir(self.root) if name.endswith(".f32")]
+        return {
+            "root": self.root,
+            "dimension": self.dimension,
+            "rows": rows,
+            "live_rows": live,
+            "segments": len(segment_files),
+            "bytes": sum(os.path.getsize(os.path.join(self.root, name)) for name in segment_files)
+        }
+
+    def _gather(self, rows: List[int]) -> np.ndarray:
+        """Copy the given rows out of the mapped segments into one matrix"""
+        rows = np.asarray(rows, dtype=np.int64)
+        matrix = np.empty((len(rows), self.dimension), dtype=np.float32)
+        segments = rows // self.segment_rows
+        for segment in np.unique(segments):
+            mask = segments == segment
+            offsets = rows[mask] % self.segment_rows
+            matrix[mask] = self._segment(int(segment), int(offsets.max()) + 1)[offsets]
+        return matrix
+
+    def _segment(self, segment: int, min_rows: int) -> np.memmap:
+        """Mapped view of a segment holding at least min_rows rows"""
+        with self._lock:
+            mapped = self._segments.get(segment)
+            if mapped is None or len(mapped) < min_rows:
+                # Segments grow as rows are appended; remap to see the new tail
+                path = self._segment_path(segment)
+                rows = os.path.getsize(path) // self.row_bytes
+                mapped = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, self.dimension))
+                self._segments[segment] = mapped
+            return mapped
+
+    def _write_rows(self, first_row: int, vectors: np.ndarray):
+        """Write consecutive rows, one seek and write per segment touched"""
+        written = 0
+        while written < len(vectors):
+            segment, offset = divmod(first_row + written, self.segment_rows)
+            count = min(len(vectors) - written, self.segment_rows - offset)
+            path = self._segment_path(segment)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.seek(offset * self.row_bytes)
+                f.write(vectors[written:written + count].astype(np.float32).tobytes())
+            written += count
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.root, f"seg-{segment:05d}.f32")
+
+    def _conn(self) -> sqlite3.Connection:
+        """One manifest connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, "manifest.db"), timeout=30,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_manifest(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS vectors (
+                row INTEGER PRIMARY KEY,
+                memory_id TEXT UNIQUE NOT NULL,
+                user_id TEXT NOT NULL,
+                topic TEXT,
+                context TEXT,
+                message TEXT,
+                message_type TEXT,
+                created_at TEXT,
+                deleted INTEGER DEFAULT 0
+            )
+        """)
+        # Covers the live-row filters, so ranking scans never touch message text
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_vectors_user_live "
+                     "ON vectors(user_id, deleted, topic, context)")
+        conn.execute("DROP INDEX IF EXISTS idx_vectors_user")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS store_info (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        conn.execute("INSERT OR IGNORE INTO store_info (key, value) VALUES ('dimension', ?)",
+                     (str(self.dimension),))
+        conn.execute("INSERT OR IGNORE INTO store_info (key, value) VALUES ('segment_rows', ?)",
+                     (str(self.segment_rows),))
+
+        info = dict(conn.execute("SELECT key, value FROM store_info").fetchall())
+        if int(info["dimension"]) != self.dimension or int(info["segment_rows"]) != self.segment_rows:
+            raise ValueError(
+                f"Vector store at {self.root} was created with dimension={info['dimension']}, "
+                f"segment_rows={info['segment_rows']}"
+            )
+
+
+# Global instance
+_vector_store = None
+_vector_store_lock = threading.Lock()
+
+
+def get_vector_store(root: str = None, dimension: int = None):
+    """Get or create the process-wide vector store: pgvector if configured, else on-disk"""
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is None:
+            from config.settings import config
+            if config.VECTOR_STORE_BACKEND == 'pgvector':
+                try:
+                    from memory.pgvector_store import PgVectorStore
+                    _vector_store = PgVectorStore(
+                        dimension=dimension or config.EMBEDDING_DIMENSION,
+                        index_type=config.PGVECTOR_INDEX,
+                        ef_search=config.PGVECTOR_EF_SEARCH,
+                        probes=config.PGVECTOR_PROBES,
+                        ivf_lists=config.PGVECTOR_IVF_LISTS
+                    )
+                    return _vector_store
+                except Exception as e:
+                    logger.warning(f"pgvector unavailable, using the local vector store: {e}")
+            _vector_store = MmapVectorStore(
+                root=root or config.VECTOR_STORE_DIR,
+                dimension=dimension or config.EMBEDDING_DIMENSION
+            )
+    return _vector_store
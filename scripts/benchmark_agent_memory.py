@@ -0,0 +1,82 @@
+"""
+Agent memory benchmark: per-turn SQLite latency, fresh connections vs pooled
+vs pooled with write-behind conversation inserts
+Replays the database calls of one MaangMentorWithMemory.process_user_input
+turn against a scratch copy of the schema
+
+Usage: python scripts/benchmark_agent_memory.py [--turns 300] [--history 2000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from maang_agent.memory_persistence import AgentMemoryManager
+
+WORDS = ("array graph tree heap trie stack queue window pointer binary search dynamic "
+         "programming greedy backtracking interval union find topological sort design "
+         "cache shard replica queue latency throughput consistency partition").split()
+
+
+def message(i: int) -> str:
+    return " ".join(WORDS[(i * 7 + j * 3) % len(WORDS)] for j in range(12))
+
+
+def seed(memory: AgentMemoryManager, user_id: str, rows: int):
+    for i in range(rows):
+        memory.store_conversation(user_id, f"seed-{i // 50}", "user" if i % 2 else "assistant",
+                                  message(i), {"category": "dsa"})
+
+
+def run_turns(memory: AgentMemoryManager, user_id: str, session_id: str, turns: int):
+    """Milliseconds per turn"""
+    timings = []
+    for i in range(turns):
+        start = time.perf_counter()
+        text = message(i)
+        memory.store_conversation(user_id, session_id, "user", text, {"category": "dsa"})
+        memory.get_conversation_history(user_id=user_id, session_id=session_id, limit=10)
+        memory.get_rag_context(user_id=user_id, query=text, limit=3)
+        memory.store_conversation(user_id, session_id, "assistant", message(i + 1), {"rag_used": True})
+        memory.get_conversation_history(user_id=user_id, session_id=session_id, limit=1000)
+        memory.get_user_summary(user_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--history", type=int, default=2000, help="messages stored before timing")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        for mode, pooled, write_behind in (("fresh", False, False), ("pooled", True, False),
+                                           ("behind", True, True)):
+            memory = AgentMemoryManager(os.path.join(scratch, f"{mode}.db"), pooled=pooled,
+                                        write_behind=write_behind)
+            seed(memory, "bench", args.history)
+            memory.flush_writes()
+            timings = sorted(run_turns(memory, "bench", "bench-session", args.turns))
+            results[mode] = statistics.mean(timings)
+            print(f"{mode:<10}{timings[len(timings) // 2]:>10.3f}"
+                  f"{timings[int(len(timings) * 0.95)]:>10.3f}{results[mode]:>10.3f}")
+            memory.close()
+            if memory.pool:
+                memory.pool.close_all()
+    
+    for mode in ("pooled", "behind"):
+        print(f"{mode} speedup {results['fresh'] / results[mode]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
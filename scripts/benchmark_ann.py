@@ -0,0 +1,78 @@
+"""
+ANN benchmark: IVF-flat vs exact search on synthetic embeddings
+Reports recall@k and per-query latency for several n_probe settings
+
+Usage: python scripts/benchmark_ann.py [--size 50000] [--dim 384] [--k 10] [--probes 4 8 16 32]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from memory.ann_index import IVFFlatIndex
+from memory.rag_engine import EmbeddingService
+
+
+def make_embeddings(size: int, dim: int, clusters: int, noise: float, seed: int) -> np.ndarray:
+    """Clustered unit vectors, closer to real sentence embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size)
+    points = centers[labels] + noise * rng.normal(size=(size, dim)).astype(np.float32)
+    return EmbeddingService.normalize(points)
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    results = [fn(query) for query in queries]
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=1.8, help="spread around cluster centres")
+    parser.add_argument("--lists", type=int, default=None, help="IVF lists (default sqrt(size))")
+    parser.add_argument("--probes", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = make_embeddings(args.size + args.queries, args.dim, args.clusters, args.noise, args.seed)
+    corpus, queries = data[:args.size], data[args.size:]
+
+    start = time.perf_counter()
+    index = IVFFlatIndex(args.dim, n_lists=args.lists, min_train_size=1)
+    index.add(np.arange(args.size), corpus)
+    build_ms = (time.perf_counter() - start) * 1000
+    stats = index.stats()
+    print(f"corpus={args.size} dim={args.dim} k={args.k} lists={stats['n_lists']} "
+          f"build={build_ms:.0f} ms")
+
+    exact, exact_ms = timed(
+        lambda query: [i for i, _ in EmbeddingService.top_k_similar(query, corpus, args.k, normalized=True)],
+        queries
+    )
+    print(f"{'backend':<14}{'recall@k':>10}{'ms/query':>12}{'speedup':>10}")
+    print(f"{'exact':<14}{1.0:>10.3f}{exact_ms:>12.3f}{1.0:>10.1f}")
+
+    for n_probe in args.probes:
+        approx, ann_ms = timed(
+            lambda query: [i for i, _ in index.search(query, args.k, n_probe=n_probe)],
+            queries
+        )
+        recall = np.mean([len(set(a) & set(e)) / args.k for a, e in zip(approx, exact)])
+        print(f"{f'ivf probe={n_probe}':<14}{recall:>10.3f}{ann_ms:>12.3f}{exact_ms / ann_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
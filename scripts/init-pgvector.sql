@@ -1,14 +1,32 @@
--- Initialize pgvector extension (optional, requires compiled extension)
--- CREATE EXTENSION IF NOT EXISTS vector;
-
--- For now, create a basic vector table without pgvector
--- Vector storage will be handled at application level
-CREATE TABLE IF NOT EXISTS vector_embeddings (
-    id SERIAL PRIMARY KEY,
-    embedding_data BYTEA,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+-- Initialize pgvector extension (the postgres service runs the pgvector/pgvector image)
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- Conversation memory vectors for RAG retrieval (memory/pgvector_store.py).
+-- Searches filter on user/topic/context and rank with
+-- ORDER BY embedding <=> query LIMIT k through the HNSW index.
+-- The dimension must match EMBEDDING_DIMENSION.
+CREATE TABLE IF NOT EXISTS memory_vectors (
+    memory_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    topic TEXT,
+    context TEXT,
+    message TEXT,
+    message_type TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    embedding vector(384) NOT NULL
 );
 
+CREATE INDEX IF NOT EXISTS idx_memory_vectors_user
+    ON memory_vectors (user_id, topic, context);
+
+CREATE INDEX IF NOT EXISTS idx_memory_vectors_hnsw
+    ON memory_vectors USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+-- With PGVECTOR_INDEX=ivfflat the application creates this instead, once
+-- the table holds data (IVFFlat lists are trained at build time):
+-- CREATE INDEX idx_memory_vectors_ivfflat
+--     ON memory_vectors USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+
 -- Grant permissions
 GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO postgres;
 GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA public TO postgres;
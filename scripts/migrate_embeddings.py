@@ -0,0 +1,115 @@
+"""
+Convert stored ConversationMemory embeddings to another storage format
+Rows are read and rewritten in id order, one batch per transaction, so the
+migration can be interrupted and re-run; rows already in the target format
+are left alone. Old and new formats are both readable while it runs.
+
+Usage: python scripts/migrate_embeddings.py --format int8 [--batch-size 500] [--user USER_ID]
+                                           [--drop-vector-embeddings] [--dry-run]
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import config
+from config.database import DatabaseManager
+from database.models import ConversationMemory, VectorEmbedding
+from memory import quantization
+
+logging.basicConfig(level=config.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+
+def migrate_embeddings(target: str, batch_size: int = 500, user_id: str = None,
+                       dry_run: bool = False) -> dict:
+    """Re-encode every readable embedding blob into the target format"""
+    quantization.check_format(target)
+    dimension = config.EMBEDDING_DIMENSION
+    totals = {"rows": 0, "converted": 0, "unchanged": 0, "unreadable": 0,
+              "bytes_before": 0, "bytes_after": 0}
+    last_id = None
+
+    while True:
+        with DatabaseManager.get_session_context() as session:
+            query = session.query(ConversationMemory.id, ConversationMemory.embedding)
+            if user_id:
+                query = query.filter(ConversationMemory.user_id == user_id)
+            if last_id is not None:
+                query = query.filter(ConversationMemory.id > last_id)
+            rows = query.order_by(ConversationMemory.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            updates = []
+            for memory_id, embedding in rows:
+                totals["rows"] += 1
+                data = bytes(embedding or b"")
+                totals["bytes_before"] += len(data)
+                decoded = quantization.decode(data, dimension)
+                if decoded is None:
+                    totals["unreadable"] += 1
+                    totals["bytes_after"] += len(data)
+                    continue
+                if decoded[2] == target:
+                    totals["unchanged"] += 1
+                    totals["bytes_after"] += len(data)
+                    continue
+
+                encoded = quantization.encode(quantization.dequantize(data, dimension), target)
+                updates.append({"id": memory_id, "embedding": encoded})
+                totals["converted"] += 1
+                totals["bytes_after"] += len(encoded)
+
+            if updates and not dry_run:
+                session.bulk_update_mappings(ConversationMemory, updates)
+            last_id = rows[-1][0]
+
+        logger.info(f"Processed {totals['rows']} rows ({totals['converted']} converted)")
+
+    return totals
+
+
+def drop_vector_embeddings(user_id: str = None, dry_run: bool = False) -> int:
+    """Delete the duplicate VectorEmbedding rows"""
+    with DatabaseManager.get_session_context() as session:
+        query = session.query(VectorEmbedding)
+        if user_id:
+            memory_ids = session.query(ConversationMemory.id).filter(ConversationMemory.user_id == user_id)
+            query = query.filter(VectorEmbedding.memory_id.in_(memory_ids.subquery()))
+        if dry_run:
+            return query.count()
+        return query.delete(synchronize_session=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--format", required=True, choices=quantization.FORMATS)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--user", default=None, help="only migrate this user's memories")
+    parser.add_argument("--drop-vector-embeddings", action="store_true",
+                        help="also delete the duplicate vector_embeddings rows")
+    parser.add_argument("--dry-run", action="store_true", help="report without writing")
+    args = parser.parse_args()
+
+    DatabaseManager.initialize()
+    totals = migrate_embeddings(args.format, args.batch_size, args.user, args.dry_run)
+    ratio = totals["bytes_before"] / totals["bytes_after"] if totals["bytes_after"] else 1.0
+    print(f"rows={totals['rows']} converted={totals['converted']} unchanged={totals['unchanged']} "
+          f"unreadable={totals['unreadable']} bytes {totals['bytes_before']} -> "
+          f"{totals['bytes_after']} ({ratio:.1f}x smaller)")
+
+    if args.drop_vector_embeddings:
+        dropped = drop_vector_embeddings(args.user, args.dry_run)
+        print(f"vector_embeddings rows {'to delete' if args.dry_run else 'deleted'}: {dropped}")
+
+    if not args.dry_run and args.format != config.EMBEDDING_STORAGE_FORMAT:
+        print(f"Set EMBEDDING_STORAGE_FORMAT={args.format} so new memories are stored the same way")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Batch driver runs must enforce the same memory cap as per-process runs
+"""
+import shutil
+
+import pytest
+
+from interview.compiler import CodeCompiler
+
+JS_BIG_HEAP = "const a = new Array(3e7).fill(1.5);\nconsole.log(a.length);"
+PY_BIG_ALLOC = "a = bytearray(400 * 1024 * 1024)\nprint(len(a))"
+
+
+def _judge(code, language, batch):
+    compiler = CodeCompiler(max_memory_mb=128, use_result_cache=False)
+    results = compiler.test_against_cases(
+        code, language, [{"input": "", "expected": "30000000"}], batch=batch
+    )
+    return results["test_results"][0]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+@pytest.mark.parametrize("batch", [False, True])
+def test_javascript_heap_cap(batch):
+    case = _judge(JS_BIG_HEAP, "javascript", batch)
+    assert not case["passed"]
+    assert case["error"]
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_python_address_space_cap(batch):
+    case = _judge(PY_BIG_ALLOC, "python", batch)
+    assert not case["passed"]
+    assert "MemoryError" in case["error"]
+
+
+if __name__ == "__main__":
+    for batch in (False, True):
+        print(f"batch={batch} javascript: {_judge(JS_BIG_HEAP, 'javascript', batch)['passed']}")
+        print(f"batch={batch} python: {_judge(PY_BIG_ALLOC, 'python', batch)['passed']}")
@@ -0,0 +1,26 @@
+"""
+parallel=True must run a submission's test cases side by side with default settings
+"""
+import time
+
+from interview.compiler import CodeCompiler
+
+SLEEPY_ECHO = "import sys, time\ntime.sleep(0.5)\nprint(sys.stdin.read().strip())"
+CASES = [{"input": str(i), "expected": str(i)} for i in range(4)]
+
+
+def test_default_workers_run_more_than_one_case():
+    assert CodeCompiler(use_result_cache=False).max_workers >= 2
+
+
+def test_parallel_cases_overlap():
+    compiler = CodeCompiler(use_result_cache=False)
+    compiler.warm_up()
+
+    started = time.monotonic()
+    results = compiler.test_against_cases(SLEEPY_ECHO, "python", CASES, parallel=True)
+    elapsed = time.monotonic() - started
+
+    assert results["passed"] == len(CASES)
+    # Four 0.5 s cases take 2 s back to back
+    assert elapsed < 1.5
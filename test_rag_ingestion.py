@@ -0,0 +1,84 @@
+"""
+Resumable document ingestion against the local memory-mapped vector store
+"""
+import hashlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from memory import rag_engine
+from memory.ingestion import DocumentIngestor, IngestCheckpoints
+from memory.vector_store import MmapVectorStore
+
+DIMENSION = 8
+# 50-char chunks with 10 chars of overlap: 10 chunks, 4 batches of 3
+DOCUMENT = "".join(f"line {i:03d} of a long study guide about graphs.\n" for i in range(9))
+
+
+class HashEmbeddings:
+    """Deterministic stand-in for the sentence-transformers model"""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def embed(self, text):
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts):
+        self.embedded += len(texts)
+        return [
+            np.frombuffer(hashlib.sha256(text.encode()).digest()[:DIMENSION], dtype=np.uint8)
+            .astype(np.float32) + 1
+            for text in texts
+        ]
+
+
+@pytest.fixture
+def engine(monkeypatch, tmp_path):
+    monkeypatch.setattr(rag_engine.EmbeddingService, "warm_up", lambda self: None)
+    engine = rag_engine.RAGMemoryEngine(vector_store=MmapVectorStore(str(tmp_path / "vectors"),
+                                                                     dimension=DIMENSION))
+    engine.ann_index = None
+    engine.embedding_service = HashEmbeddings()
+    return engine
+
+
+def _ingestor(engine, tmp_path):
+    return DocumentIngestor(engine, IngestCheckpoints(str(tmp_path / "checkpoints.db")), batch_size=3)
+
+
+def test_store_memory_persists_and_returns_id(engine):
+    memory_id = engine.store_memory("user-1", "graphs", "session", "BFS finds shortest paths")
+
+    assert engine.vector_store.contains(memory_id)
+
+
+def test_interrupted_ingest_resumes_from_checkpoint(engine, tmp_path):
+    chunks = list(engine.iter_chunks(DOCUMENT, 50, 10))
+    assert len(chunks) == 10
+
+    # Stop after two of the four batches, as if the process died
+    progress = _ingestor(engine, tmp_path).iter_ingest("user-1", "guide", DOCUMENT, "graphs",
+                                                       chunk_size=50, overlap=10)
+    assert [next(progress)["chunks_done"] for _ in range(2)] == [3, 6]
+    progress.close()
+
+    engine.embedding_service.embedded = 0
+    result = _ingestor(engine, tmp_path).ingest("user-1", "guide", DOCUMENT, "graphs",
+                                                chunk_size=50, overlap=10)
+
+    assert result["resumed_from"] == 6
+    assert result["stored"] == 4
+    assert result["completed"]
+    # Only the chunks after the checkpoint were embedded again
+    assert engine.embedding_service.embedded == 4
+
+    rows, _, _ = engine.vector_store.user_rows("user-1")
+    stored = engine.vector_store.records(rows)
+    assert sorted(record["message"] for record in stored.values()) == sorted(chunks)
+
+    again = _ingestor(engine, tmp_path).ingest("user-1", "guide", DOCUMENT, "graphs",
+                                               chunk_size=50, overlap=10)
+    assert again["completed"] and again["stored"] == 0
+    assert len(engine.vector_store.user_rows("user-1")[0]) == 10
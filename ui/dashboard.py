@@ -72,9 +72,11 @@ def require_auth(f):
 # Try to register interview blueprint if available
 socketio_instance = None
 try:
-    from ui.interview_routes import interview_bp, init_socketio
+    from ui.interview_routes import interview_bp, init_socketio, compiler as interview_compiler
     app.register_blueprint(interview_bp)
     print("[OK] Interview blueprint registered successfully")
+    # Sandbox workers are started here, not when the routes module is imported
+    interview_compiler.warm_up()
     socketio_instance = init_socketio(app)
     if socketio_instance:
         print("[OK] SocketIO initialized successfully")
@@ -86,6 +88,18 @@ except Exception as e:
     print(f"[WARN] Warning: Interview routes not available: {e}")
     traceback.print_exc()
 
+# Load the embedding model in the background so the first RAG request after
+# a restart does not pay for it; retrieval degrades to keywords until ready
+EmbeddingService = None
+try:
+    from memory.rag_engine import EmbeddingService
+    from config.settings import config as app_config
+    if app_config.EMBEDDING_WARMUP_ON_START:
+        EmbeddingService.warm_up()
+        print("[OK] Embedding model warm-up started")
+except Exception as e:
+    print(f"[WARN] Warning: Embedding model warm-up not available: {e}")
+
 from tracker.tracker import snapshot_github, snapshot_leetcode, call_mcp
 from roadmap.generator import recommend as get_recommendations
 
@@ -848,8 +862,17 @@ def run_code_api():
     
     try:
         from interview.compiler import CodeCompiler
+        from interview.submission_queue import get_submission_scheduler, request_submitter, SubmissionRejected
         compiler = CodeCompiler()
-        result = compiler.compile_and_run(code, language, input_data, stdin_input=True)
+        
+        try:
+            # Keyed on the authenticated caller, not a client-supplied user_id
+            with get_submission_scheduler().slot(request_submitter(request)):
+                result = compiler.compile_and_run(code, language, input_data, stdin_input=True)
+        except SubmissionRejected as e:
+            response = jsonify({"success": False, "error": str(e), "retry_after": e.retry_after})
+            response.headers["Retry-After"] = str(e.retry_after)
+            return response, 429
         
         return jsonify({
             "success": result.success,
@@ -2315,6 +2338,29 @@ def test_leetcode_session():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route("/api/health", methods=["GET"])
+def health():
+    """Liveness check with embedding model readiness"""
+    embedding_model = EmbeddingService.status() if EmbeddingService else {"ready": False, "error": "unavailable"}
+    return jsonify({
+        "status": "ok",
+        "ready": embedding_model["ready"],
+        "embedding_model": embedding_model,
+        "timestamp": datetime.now().isoformat()
+    })
+
+
+@app.route("/api/health/ready", methods=["GET"])
+def readiness():
+    """Readiness probe: 503 until the embedding model is loaded"""
+    if EmbeddingService and EmbeddingService.is_ready():
+        return jsonify({"ready": True})
+    if EmbeddingService:
+        # A failed or never-started load is retried rather than waited on forever
+        EmbeddingService.warm_up()
+    return jsonify({"ready": False}), 503
+
+
 if __name__ == "__main__":
     # Use SocketIO if available, otherwise use regular Flask app
     if socketio_instance:
@@ -21,9 +21,10 @@ from interview.simulation_engine import (
     InterviewMode,
     CompanyRole
 )
-from interview.compiler import CodeCompiler, InterviewCodeValidator
+from interview.compiler import CodeCompiler, InterviewCodeValidator, compiler_cases
 from interview.scheduler import InterviewScheduler, InterviewStatus
 from interview.enhanced_manager import get_interview_manager
+from interview.submission_queue import get_submission_scheduler, request_submitter, SubmissionRejected
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -98,6 +99,8 @@ def init_socketio(app):
             user_id = data.get('user_id')
             code = data.get('code')
             language = data.get('language', 'python')
+            # Opt-in: clients that don't ask keep getting every case's result
+            fail_fast = data.get('fail_fast', False)
             
             logger.info(f"Code submission from {user_id} in {language}")
             
@@ -106,17 +109,47 @@ def init_socketio(app):
                 if session_id_int in active_sessions:
                     session = active_sessions[session_id_int]
                     problem_id = session.get('problem_id')
+                    test_cases = session.get('test_cases', [])
+                    room = f"session_{session_id}"
                     
-                    # Run tests
-                    result = engine.submit_code(session_id_int, user_id, code, language, 
-                                               session.get('test_cases', []))
+                    # Run tests, pushing each case to the room as it finishes
+                    with get_submission_scheduler().slot(request_submitter(request)):
+                        validation = {
+                            'passed': 0,
+                            'failed': 0,
+                            'skipped': len(test_cases),
+                            'execution_time_ms': 0,
+                            'test_results': []
+                        }
+                        for case_result in compiler.iter_test_cases(
+                                code, language, compiler_cases(test_cases),
+                                parallel=True, batch=True, problem_id=problem_id,
+                                fail_fast=fail_fast):
+                            validation['passed' if case_result['passed'] else 'failed'] += 1
+                            validation['skipped'] -= 1
+                            validation['execution_time_ms'] += case_result['execution_time_ms']
+                            validation['test_results'].append(case_result)
+                            emit('submission_progress', {
+                                'case': case_result,
+                                'completed': len(validation['test_results']),
+                                'total': len(test_cases)
+                            }, room=room)
+                        
+                        validation['test_results'].sort(key=lambda case: case['test_case_number'])
+                        result = engine.submit_code(session_id_int, user_id, code, language,
+                                                    test_cases, validation=validation)
                     
                     # Broadcast results
                     emit('submission_result', {
                         'submission_id': result['submission_id'],
                         'validation': result['validation'],
                         'timestamp': result['timestamp']
-                    }, room=f"session_{session_id}")
+                    }, room=room)
+            except SubmissionRejected as e:
+                emit('submission_rejected', {
+                    'error': str(e),
+                    'retry_after': e.retry_after
+                })
             except (ValueError, KeyError) as e:
                 logger.error(f"Error handling code submission: {e}")
         
@@ -327,7 +360,8 @@ def submit_code(session_id):
             session_id=session_id,
             code=code,
             language=language,
-            custom_input=custom_input
+            custom_input=custom_input,
+            submitter=request_submitter(request)
         )
         
         logger.info(f"Code submission in session {session_id}: {result.get('success', False)}")
@@ -344,6 +378,10 @@ def submit_code(session_id):
                 'ai_feedback': result.get('ai_feedback', {})
             }
         })
+    except SubmissionRejected as e:
+        response = jsonify({'success': False, 'error': str(e), 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
     except Exception as e:
         logger.error(f"Error submitting code: {e}")
         import traceback
@@ -516,6 +554,22 @@ def get_friday_info():
 
 
 # Health check
+@interview_bp.route('/compiler/stats', methods=['GET'])
+def compiler_stats():
+    """Rolling sandbox run/compile stats per language, with optional recent history"""
+    language = request.args.get('language')
+    history_limit = request.args.get('history', 0, type=int)
+    
+    response = {
+        'success': True,
+        'stats': compiler.get_execution_stats(language),
+        'timestamp': datetime.now().isoformat()
+    }
+    if history_limit > 0:
+        response['history'] = compiler.execution_stats.history(history_limit)
+    return jsonify(response)
+
+
 @interview_bp.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -523,5 +577,6 @@ def health():
         'success': True,
         'status': 'Interview service running',
         'active_sessions': len(active_sessions),
+        'submission_queue': get_submission_scheduler().stats(),
         'timestamp': datetime.now().isoformat()
     })